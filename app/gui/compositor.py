@@ -0,0 +1,156 @@
+# app/gui/compositor.py
+import numpy as np
+
+class Compositor:
+    """
+    Blends the tree and every ornament sprite into one preallocated RGBA frame.
+    Works on premultiplied float32 buffers, so the result does not depend on Tk
+    and can be reused for screenshots, video export or headless tests.
+    Sprites entirely hidden under opaque pixels of later sprites are skipped,
+    which keeps crowded scenes (thousands of ornaments) cheap.
+    """
+    def __init__(self, size=(600, 580), sprite_cache_size=256):
+        self.width, self.height = size
+        self.frame = np.zeros((self.height, self.width, 4), dtype=np.float32)  # premultiplied
+        self.output = np.zeros((self.height, self.width, 4), dtype=np.uint8)   # straight alpha
+        self._tiles = {}     # contiguous scratch buffers, one per region shape
+        self._sprites = {}   # {id(image): (image, premultiplied array, drawn mask, opaque mask)}
+        self._covered = np.zeros((self.height, self.width), dtype=bool)
+        self._touched = np.zeros((self.height, self.width, 1), dtype=bool)
+        self.sprite_cache_size = sprite_cache_size
+
+    @staticmethod
+    def premultiply(image):
+        """PIL image -> (H, W, 4) float32 premultiplied RGBA in [0, 1]."""
+        rgba = np.asarray(image.convert("RGBA") if image.mode != "RGBA" else image,
+                          dtype=np.float32) / 255.0
+        rgba[:, :, :3] *= rgba[:, :, 3:4]
+        return rgba
+
+    def _cached(self, image):
+        # Animation frames and sprites are shared, so most lookups hit
+        cached = self._sprites.get(id(image))
+        if cached is not None and cached[0] is image:
+            return cached
+        if len(self._sprites) >= self.sprite_cache_size:
+            self._sprites.pop(next(iter(self._sprites)))
+        premult = self.premultiply(image)
+        alpha = premult[:, :, 3]
+        cached = self._sprites[id(image)] = (image, premult, alpha > 0, alpha == 1.0)
+        return cached
+
+    def _sprite(self, image):
+        return self._cached(image)[1]
+
+    def _visible(self, placed):
+        """
+        (sprite, x0, y0) of the sprites that show, in drawing order: walking from
+        the top, a sprite whose drawn pixels are all under opaque pixels of the
+        sprites above it would be overwritten entirely.
+        """
+        covered = self._covered
+        covered.fill(False)
+        visible = []
+        for image, (x, y) in reversed(placed):
+            _, sprite, drawn, opaque = self._cached(image)
+            h, w = sprite.shape[:2]
+            # same placement as the canvas' anchor="center"
+            x0, y0 = int(x) - w // 2, int(y) - h // 2
+            fx0, fy0, fx1, fy1 = self._clip(x0, y0, w, h)
+            if fx0 >= fx1 or fy0 >= fy1:
+                continue
+            region = covered[fy0:fy1, fx0:fx1]
+            sx, sy = fx0 - x0, fy0 - y0
+            # drawn > region: pixels of this sprite not yet hidden
+            if region.all() or not (drawn[sy:sy + fy1 - fy0, sx:sx + fx1 - fx0] > region).any():
+                continue
+            region |= opaque[sy:sy + fy1 - fy0, sx:sx + fx1 - fx0]
+            visible.append((sprite, x0, y0))
+        visible.reverse()
+        return visible
+
+    def _tile(self, shape):
+        tile = self._tiles.get(shape)
+        if tile is None:
+            tile = self._tiles[shape] = np.empty(shape, dtype=np.float32)
+        return tile
+
+    def _clip(self, x0, y0, w, h):
+        return max(x0, 0), max(y0, 0), min(x0 + w, self.width), min(y0 + h, self.height)
+
+    def _blend(self, sprite, x0, y0):
+        """'Over' blend of a premultiplied sprite with its top-left corner at (x0, y0), clipped."""
+        h, w = sprite.shape[:2]
+        fx0, fy0, fx1, fy1 = self._clip(x0, y0, w, h)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return None
+        src = sprite[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+        dst = self.frame[fy0:fy1, fx0:fx1]
+        tmp = self._tile((fy1 - fy0, fx1 - fx0, 1))
+
+        # dst = src + dst * (1 - src_alpha)
+        np.subtract(1.0, src[:, :, 3:4], out=tmp)
+        np.multiply(dst, tmp, out=dst)
+        np.add(dst, src, out=dst)
+        return fx0, fy0, fx1, fy1
+
+    def _resolve(self, rect):
+        """Un-premultiply one region of the frame into the uint8 output."""
+        fx0, fy0, fx1, fy1 = rect
+        src = self.frame[fy0:fy1, fx0:fx1]
+        tmp = self._tile((fy1 - fy0, fx1 - fx0, 4))
+        alpha = src[:, :, 3:4]
+        safe_alpha = self._tile((fy1 - fy0, fx1 - fx0, 1))
+        # premultiplied color is 0 wherever alpha is 0, so a tiny floor is enough
+        np.maximum(alpha, 1e-6, out=safe_alpha)
+        np.divide(src, safe_alpha, out=tmp)
+        tmp[:, :, 3:4] = alpha
+        np.multiply(tmp, 255.0, out=tmp)
+        np.rint(tmp, out=tmp)
+        np.clip(tmp, 0, 255, out=tmp)
+        self.output[fy0:fy1, fx0:fx1] = tmp  # cast back to uint8 in place
+
+    def compose(self, tree, ornaments):
+        """Compose the scene and return the straight-alpha uint8 RGBA frame (reused buffer)."""
+        background = self._sprite(tree)
+        if background.shape == self.frame.shape:
+            tree_pixels = np.asarray(tree)
+            self.frame[...] = background
+            self.output[...] = tree_pixels   # untouched pixels stay exactly the tree's
+            dirty = []
+        else:
+            tree_pixels = None
+            self.frame.fill(0)
+            self.output.fill(0)
+            dirty = [self._blend(background, 0, 0)]
+
+        if hasattr(ornaments, "sprites"):
+            # OrnamentList: images resolved per type, positions straight from the table
+            images, positions = ornaments.sprites()
+            placed = list(zip(images, positions.astype(np.int32).tolist()))
+        else:
+            placed = [(ornament.image, ornament.position) for ornament in ornaments]
+
+        area = 0
+        for sprite, x0, y0 in self._visible(placed):
+            rect = self._blend(sprite, x0, y0)
+            if rect is not None:
+                dirty.append(rect)
+                area += (rect[2] - rect[0]) * (rect[3] - rect[1])
+
+        # only regions covered by sprites need converting back to straight alpha;
+        # once they overlap more than the frame's area, one pass over the frame is
+        # cheaper, and the pixels outside every region get the tree's back
+        if area >= self.width * self.height:
+            touched = self._touched
+            touched.fill(False)
+            for fx0, fy0, fx1, fy1 in filter(None, dirty):
+                touched[fy0:fy1, fx0:fx1] = True
+            self._resolve((0, 0, self.width, self.height))
+            if tree_pixels is not None:
+                np.copyto(self.output, tree_pixels, where=~touched)
+            return self.output
+        for rect in dirty:
+            if rect is not None:
+                self._resolve(rect)
+        return self.output
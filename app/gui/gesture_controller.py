@@ -0,0 +1,172 @@
+# app/gui/gesture_controller.py
+import os
+import time
+from utils.assets import get_sprite
+
+
+class ControllerView:
+    """
+    What the controller shows to the user. The Tk window implements these with
+    its menus; the default no-ops are enough for headless runs.
+    """
+    def show_painting_menu(self):
+        pass
+
+    def hide_painting_menu(self):
+        pass
+
+    def select_ornament(self, index, color):
+        pass
+
+    def select_painting(self, index):
+        pass
+
+
+class GestureController:
+    """
+    Gesture state machine, free of Tk: turns (finger count, hand detected) into
+    scene changes on an OrnamentManager.
+    - "ornament" mode: a stable count of 1, 2, 4 or 5 adds that ornament, 0 removes
+      the last one, 3 opens the painting menu
+    - "painting" mode: 1..N selects a painting, 0 confirms (or cancels) and returns
+    - clock: time source in seconds, for stability and cooldown (injectable so
+      headless runs can simulate time)
+    """
+    def __init__(self, manager, painting_paths, view=None, clock=time.time):
+        self.manager = manager
+        self.painting_paths = painting_paths
+        self.view = view or ControllerView()
+        self.clock = clock
+
+        self.mode = "ornament"  # "ornament" or "painting"
+        self.last_add_time = float("-inf")  # no action yet
+        self.add_cooldown = 0.5  # cooldown between add/remove actions
+        self.last_finger_count = None
+        self.finger_stable_since = 0
+        self.required_stable_time = 0.25  # seconds
+        self.painting_menu_visible = False
+        self.painting_selection = None  # index of the highlighted painting
+
+    def handle(self, count, hand_detected):
+        if self.mode == "ornament":
+            self._handle_ornament_mode(count, hand_detected)
+        elif self.mode == "painting":
+            self._handle_painting_mode(count, hand_detected)
+
+    def manual_add(self, idx):
+        """Keyboard/manual selection"""
+        if idx == 3:
+            # Enter painting selection mode
+            self.mode = "painting"
+            self._show_painting_menu()
+            return
+        self.manager.add_ornament_random(idx)  # on the foliage, from the manager's rng
+
+    def _show_painting_menu(self):
+        self.painting_menu_visible = True
+        self.view.show_painting_menu()
+
+    def _hide_painting_menu(self):
+        if self.painting_menu_visible:
+            self.painting_menu_visible = False
+            self.view.hide_painting_menu()
+
+    def _select_painting(self, index):
+        self.painting_selection = index
+        self.view.select_painting(index)
+
+    def _finger_stable(self, count):
+        now = self.clock()
+        if self.last_finger_count != count:
+            self.last_finger_count = count
+            self.finger_stable_since = now
+            return False
+        return (now - self.finger_stable_since) >= self.required_stable_time
+
+    def _handle_ornament_mode(self, count, hand_detected):
+        if not hand_detected or not self._finger_stable(count):
+            # If hand is not stable, or not detected, ensure painting menu is hidden
+            self._hide_painting_menu()
+            return
+
+        now = self.clock()
+        if now - self.last_add_time < self.add_cooldown:
+            return
+
+        if count == 0:
+            last = self.manager.remove_last()
+            self.last_add_time = now
+            if last:
+                self.view.select_ornament(last.type_id - 1, color="red")
+            self._hide_painting_menu()
+
+        elif count == 3:
+            # Enter painting selection
+            self.mode = "painting"
+            if not self.painting_menu_visible:
+                self._show_painting_menu()
+            # Reset the selection upon entering the mode
+            if self.painting_selection is not None:
+                self._select_painting(None)
+
+        else:
+            self.manager.add_ornament_random(count)
+            self.last_add_time = now
+            self.view.select_ornament(count - 1, color="green")
+            self._hide_painting_menu()
+
+    def _handle_painting_mode(self, count, hand_detected):
+        if not self._finger_stable(count):
+            return
+
+        now = self.clock()
+        n = len(self.painting_paths)
+
+        # 1. Selection logic (Hand is present, count is 1 to N)
+        if hand_detected and 1 <= count <= n:
+            self._select_painting(count - 1)
+
+        # 2. Confirmation/Cancellation logic (Hand is closed OR hand disappears)
+        # We use a stable count of 0 (either closed hand or no hand detected)
+        elif count == 0 and now - self.last_add_time >= self.add_cooldown:
+            if self.painting_selection is not None:
+                path = self.painting_paths[self.painting_selection]
+                if os.path.exists(path):
+                    self.manager.add_ornament_random(3, ref_image=get_sprite(path))
+                    self.view.select_ornament(3 - 1, color="green")
+                else:
+                    print(f"Error: Painting file not found at {path}.")
+
+            # Back to ornament mode (whether an item was added or not)
+            self._hide_painting_menu()
+            self.mode = "ornament"
+            self.last_add_time = now
+
+
+class MultiUserController:
+    """
+    Several users in front of one camera: the mirrored frame is split into one
+    vertical band per controller, and each detected hand drives the controller
+    of the band its wrist is in (first hand wins when two share a band).
+    """
+    def __init__(self, controllers):
+        self.controllers = list(controllers)
+
+    def assign(self, hands):
+        """One HandResult or None per controller."""
+        n = len(self.controllers)
+        assigned = [None] * n
+        for hand in hands:
+            band = min(n - 1, max(0, int(hand.landmarks[0, 0] * n)))
+            if assigned[band] is None:
+                assigned[band] = hand
+        return assigned
+
+    def handle_hands(self, hands):
+        assigned = self.assign(hands)
+        for controller, hand in zip(self.controllers, assigned):
+            if hand is None:
+                controller.handle(0, False)
+            else:
+                controller.handle(hand.finger_count, True)
+        return assigned
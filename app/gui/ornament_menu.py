@@ -1,7 +1,8 @@
 # app/gui/ornament_menu.py
 import tkinter as tk
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from utils.config import ASSETS_PATH
+from utils.assets import get_sprite
 import os
 
 class OrnamentMenu:
@@ -20,9 +21,9 @@ class OrnamentMenu:
         self.images.clear()
         self.tk_images.clear()
         for i in range(1, self.num_ornaments + 1):
-            path = os.path.join(ASSETS_PATH, "ornaments", f"ornament{i}.png")
-            if os.path.exists(path):
-                img = Image.open(path).resize((50, 50))
+            path = os.path.join("ornaments", f"ornament{i}.png")
+            if os.path.exists(os.path.join(ASSETS_PATH, path)):
+                img = get_sprite(path, (50, 50))
                 self.images.append(img)
                 self.tk_images.append(ImageTk.PhotoImage(img))
             else:
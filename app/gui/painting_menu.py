@@ -1,5 +1,6 @@
 import tkinter as tk
-from PIL import Image, ImageTk
+from PIL import ImageTk
+from utils.assets import get_sprite
 
 class PaintingMenu:
     """Horizontal menu for selecting painting reference images"""
@@ -20,7 +21,7 @@ class PaintingMenu:
 
         for path in self.paths:
             try:
-                img = Image.open(path).resize((50, 50))
+                img = get_sprite(path, (50, 50))
                 self.images.append(img)
                 self.tk_images.append(ImageTk.PhotoImage(img))
             except Exception as e:
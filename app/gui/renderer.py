@@ -1,27 +1,149 @@
 # app/gui/renderer.py
+import numpy as np
 from PIL import Image, ImageTk
-import os
-from utils.config import ASSETS_PATH
+from utils.assets import get_sprite
+from gui.compositor import Compositor
+from ornaments.ornament import Ornament
 
 class TreeRenderer:
-    def __init__(self, ornament_manager):
+    """
+    Retained-mode renderer: one canvas item per ornament row, created once.
+    PhotoImages are shared by lanes: rows of a type that were in the same
+    animation state when drawn stay in step, so each lane's PhotoImage is pasted
+    once per frame change instead of touching every item.
+    With compositor=True the whole scene is blended in NumPy instead and reaches
+    Tk as a single PhotoImage update per frame, whatever the number of ornaments.
+    """
+    def __init__(self, ornament_manager, compositor=False):
         self.manager = ornament_manager
-        tree_path = os.path.join(ASSETS_PATH, "tree.png")
-        self.tree_img = Image.open(tree_path).resize((600, 580))
+        self.tree_img = get_sprite("tree.png", (600, 580))
         # Give manager a reference to the tree
         self.manager.set_tree(self.tree_img)
 
-    def render(self, canvas):
+        self.canvas = None
+        self.tree_item = None
+        self.tree_photo = None
+        self.tree_source = None   # PIL image currently shown as the tree
+        self.item_ids = []        # canvas item of each scene row, in row order
+        self.item_uids = np.empty(0, dtype=np.int64)
+        self.item_lanes = []      # lane of each row
+        self.item_positions = np.empty((0, 2), dtype=np.float32)
+        self.lanes = {}           # {lane id: [photo, image, rows]}
+        self.next_lane = 0
+        self.use_compositor = compositor
+        self.compositor = Compositor(self.tree_img.size) if compositor else None
+
+    def _reset(self, canvas):
         canvas.delete("all")
+        self.canvas = canvas
+        self.tree_item = None
+        self.item_ids = []
+        self.item_uids = self.item_uids[:0]
+        self.item_lanes = []
+        self.item_positions = self.item_positions[:0]
+        self.lanes.clear()
+
+    def _draw_tree(self, canvas):
+        tree = self.manager.current_tree
+        if self.tree_item is None:
+            self.tree_photo = ImageTk.PhotoImage(tree)
+            self.tree_item = canvas.create_image(0, 0, anchor="nw", image=self.tree_photo)
+            canvas.image_ref = self.tree_photo
+        elif tree is not self.tree_source:
+            self.tree_photo.paste(tree)
+        self.tree_source = tree
+
+    def _drop_items(self, canvas, start):
+        """Delete the items of rows start.. (rows are only appended and popped at the end)."""
+        for i in range(len(self.item_ids) - 1, start - 1, -1):
+            canvas.delete(self.item_ids.pop())
+            lane_id = self.item_lanes.pop()
+            rows = self.lanes[lane_id][2]
+            rows.pop()  # i, the lane's last row
+            if not rows:
+                del self.lanes[lane_id]
+        self.item_uids = self.item_uids[:start]
+        self.item_positions = self.item_positions[:start]
+
+    def _add_items(self, canvas, scene, start):
+        n = len(scene)
+        def state(i):
+            return int(scene.type_id[i]), int(scene.phase[i]), int(scene.shown[i])
+
+        # a new row joins the lane that is currently in the same state, if any
+        by_state = {state(lane[2][0]): lane_id for lane_id, lane in self.lanes.items()}
+        for i in range(start, n):
+            lane_id = by_state.get(state(i))
+            if lane_id is None:
+                image = Ornament.view(scene, i).image
+                lane_id = by_state[state(i)] = self.next_lane
+                self.lanes[lane_id] = [ImageTk.PhotoImage(image), image, []]
+                self.next_lane += 1
+            lane = self.lanes[lane_id]
+            lane[2].append(i)
+            x, y = scene.position[i]
+            self.item_ids.append(canvas.create_image(int(x), int(y), anchor="center", image=lane[0]))
+            self.item_lanes.append(lane_id)
+        self.item_uids = scene.uid[:n].copy()
+        self.item_positions = np.concatenate((self.item_positions, scene.position[start:n]))
+
+    def _draw_ornaments(self, canvas):
+        scene = self.manager.scene
+        n = len(scene)
+        # Rows that were removed or replaced since the last frame, then new rows on top
+        m = min(n, len(self.item_ids))
+        changed = np.flatnonzero(self.item_uids[:m] != scene.uid[:m])
+        keep = int(changed[0]) if len(changed) else m
+        if keep < len(self.item_ids):
+            self._drop_items(canvas, keep)
+        if keep < n:
+            self._add_items(canvas, scene, keep)
+
+        # One paste per lane whose frame changed
+        for lane in self.lanes.values():
+            photo, image, rows = lane
+            current = Ornament.view(scene, rows[0]).image
+            if current is image:
+                continue
+            if current.size == image.size:
+                photo.paste(current)
+            else:
+                lane[0] = photo = ImageTk.PhotoImage(current)
+                for i in rows:
+                    canvas.itemconfig(self.item_ids[i], image=photo)
+            lane[1] = current
+
+        moved = np.flatnonzero((self.item_positions != scene.position[:n]).any(axis=1))
+        for i in moved:
+            x, y = scene.position[i]
+            canvas.coords(self.item_ids[i], int(x), int(y))
+        self.item_positions[moved] = scene.position[moved]
+
+    def compose(self):
+        """Composed RGBA frame of the current scene (reused buffer, copy to keep it)."""
+        if self.compositor is None:
+            self.compositor = Compositor(self.tree_img.size)  # screenshots in retained mode
+        return self.compositor.compose(self.manager.current_tree, self.manager.ornaments)
+
+    def _render_composed(self, canvas):
+        frame = Image.fromarray(self.compose())
+        if self.tree_item is None:
+            self.tree_photo = ImageTk.PhotoImage(frame)
+            self.tree_item = canvas.create_image(0, 0, anchor="nw", image=self.tree_photo)
+            canvas.image_ref = self.tree_photo
+        else:
+            self.tree_photo.paste(frame)
+
+    def render(self, canvas):
+        if canvas is not self.canvas:
+            self._reset(canvas)
+
+        if self.use_compositor:
+            self._render_composed(canvas)
+            return
 
         # Draw tree
-        tk_tree = ImageTk.PhotoImage(self.manager.current_tree)
-        canvas.image_ref = tk_tree
-        canvas.create_image(0, 0, anchor="nw", image=tk_tree)
-
-        # Draw ornaments
-        for ornament in self.manager.ornaments:
-            tk_img = ImageTk.PhotoImage(ornament.image)
-            ornament.tk_img = tk_img
-            x, y = ornament.position
-            canvas.create_image(x, y, anchor="center", image=tk_img)
+        self._draw_tree(canvas)
+
+        # Draw ornaments (new ones are created on top, matching row order)
+        self._draw_ornaments(canvas)
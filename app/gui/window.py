@@ -3,37 +3,110 @@ import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import cv2
+import threading
 import time
-from vision.camera_thread import CameraThread
-from vision.hand_detector import HandGesture
+from vision.recording import SessionRecorder
+from vision.drawing import draw_hand
 from gui.renderer import TreeRenderer
 from ornaments.manager import OrnamentManager
 from gui.ornament_menu import OrnamentMenu
 from gui.painting_menu import PaintingMenu
-from utils.config import ASSETS_PATH
-import random
+from gui.gesture_controller import ControllerView, GestureController, MultiUserController
+from utils.config import ASSETS_PATH, USE_COMPOSITOR, USE_INFERENCE_WORKER, USERS
+from utils.config import HAND_TRACK_ROI, HAND_INFERENCE_SIZE, HAND_DETECT_EVERY
+from utils.config import TARGET_FPS, DETECTION_FPS, ANIMATION_FPS, RENDER_FPS, PREVIEW_FPS
+from utils.config import SHOW_PREVIEW, PREVIEW_WIDTH
+from utils.scheduler import FrameScheduler
+from utils.profiler import profiler
+from utils.config import ROOT, PROFILE
 import os
 
+class UserPanel(ControllerView):
+    """
+    One user's tree, ornament menu and painting menu, in a column of the window;
+    the view of that user's GestureController.
+    """
+    def __init__(self, parent, column, manager, painting_paths):
+        self.manager = manager
+        self.renderer = TreeRenderer(manager, compositor=USE_COMPOSITOR)
+
+        frame = ttk.Frame(parent)
+        frame.grid(row=0, column=column, sticky="nsew", padx=10, pady=10)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_rowconfigure(1, weight=0)
+        frame.grid_rowconfigure(2, weight=0)
+        frame.grid_columnconfigure(0, weight=1)
+
+        # Tree canvas
+        self.tree_canvas = tk.Canvas(frame, width=600, height=580)
+        self.tree_canvas.grid(row=0, column=0, sticky="ns")
+
+        # Ornament menu canvas
+        self.menu_canvas = tk.Canvas(frame, width=600, height=70)
+        self.menu_canvas.grid(row=1, column=0, sticky="ew")
+        self.menu = OrnamentMenu(self.menu_canvas)
+        self.menu.render(self.menu_canvas)
+
+        # Painting menu canvas (hidden initially)
+        self.painting_menu_canvas = tk.Canvas(frame, width=600, height=70)
+        self.painting_menu_canvas.grid(row=2, column=0, sticky="ew")
+        self.painting_menu_canvas.grid_remove()  # start hidden
+        self.painting_menu = PaintingMenu(self.painting_menu_canvas, painting_paths)
+
+    def render(self):
+        self.renderer.render(self.tree_canvas)
+
+    # ControllerView: how gesture decisions show up in the menus
+    def show_painting_menu(self):
+        self.painting_menu_canvas.grid()
+        self.painting_menu.render(self.painting_menu_canvas)
+
+    def hide_painting_menu(self):
+        self.painting_menu_canvas.grid_remove()
+
+    def select_ornament(self, index, color):
+        self.menu.select(index, self.menu_canvas, color=color)
+
+    def select_painting(self, index):
+        self.painting_menu.select(index, self.painting_menu_canvas)
+
+
 class MainWindow:
-    def __init__(self):
+    """
+    - record_path: directory to record camera frames and detection results to
+    - replay_path: recorded session to play back instead of the webcam
+    - replay_realtime: play back at the recorded pace (False = one frame per update)
+    - replay_detections: reuse the recorded detections instead of running MediaPipe
+    - started_at: time.perf_counter() at process start, for the startup report
+    - users: users decorating side by side trees from one camera, each hand driving
+      the tree of the camera band its wrist is in (needs live HandGesture detection)
+    The camera and the hand model (MediaPipe import and graph construction) are
+    built by a background warm-up, so the tree shows up before they are ready.
+    """
+    def __init__(self, record_path=None, replay_path=None, replay_realtime=True, replay_detections=False,
+                 started_at=None, users=USERS):
+        if users > 1 and replay_detections:
+            raise ValueError("Several users need live hand detection")
+        self.users = users
+        self.started_at = started_at if started_at is not None else time.perf_counter()
         self.root = tk.Tk()
         self.root.title("Gesture Tree Decorator")
 
-        # Core systems
-        self.camera = CameraThread()
-        self.detector = HandGesture()
-        self.manager = OrnamentManager()
-        self.renderer = TreeRenderer(self.manager)
-        self.last_add_time = 0
-        self.add_cooldown = 0.5  # cooldown between add/remove actions
+        # Core systems (camera and detector arrive with the warm-up)
+        self.camera = None
+        self.detector = None
+        self.warmup_error = None
+        self._closing = False
+        self._warmup_lock = threading.Lock()  # _closing vs. handing over camera and detector
+        self._warmup_done = threading.Event()
+        self.recorder = SessionRecorder(record_path) if record_path else None
+        self.managers = [OrnamentManager() for _ in range(users)]
+        self.manager = self.managers[0]
+        for manager in self.managers[1:]:
+            manager.cdf_cache = self.manager.cdf_cache  # one artwork CDF cache for every tree
         self.cam_width = None
         self.cam_height = None
-
-        # Modes & finger stability
-        self.mode = "ornament"  # "ornament" or "painting"
-        self.last_finger_count = None
-        self.finger_stable_since = 0
-        self.required_stable_time = 0.25  # seconds
+        self.last_frame_seq = None  # sequence number of the last processed camera frame
 
         # Painting menu data
         # Define paths once
@@ -43,213 +116,291 @@ class MainWindow:
             os.path.join(ASSETS_PATH, "artworks", f"artwork{3}.jpeg"),  
             os.path.join(ASSETS_PATH, "artworks", f"artwork{4}.jpeg") 
         ]
-        self.painting_menu = None # Will be initialized in _build_ui
+        self._warmup = threading.Thread(
+            target=self._warm_up, args=(replay_path, replay_realtime, replay_detections),
+            name="warm-up", daemon=True)
+        self._warmup.start()
 
-        # UI
+        # UI: one panel (tree + menus) per user
         self._build_ui()
-        self.root.bind("<Key>", self._on_key)
 
-        # Update loop
+        # Gesture state machines (modes, finger stability, cooldown), one per user,
+        # each shown by its panel
+        self.controllers = [GestureController(manager, self.painting_paths, view=panel)
+                            for manager, panel in zip(self.managers, self.panels)]
+        self.controller = self.controllers[0]
+        self.multi_user = MultiUserController(self.controllers) if users > 1 else None
+        self.root.after_idle(self._report_window_ready)
+        self.root.after(50, self._poll_warm_up)
+        self.root.bind("<Key>", self._on_key)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Update loop: gesture handling is essential, the rest is dropped first when behind
+        # Preview: landmarks are drawn on the downsampled image, not on the camera frame
+        self.pending_preview = None  # (mirrored BGR frame, its RGB version or None, landmarks)
+        self.preview_photo = None    # persistent PhotoImage, updated in place
+        self.show_preview = SHOW_PREVIEW
+        profiler.enabled = PROFILE
+        self.scheduler = FrameScheduler(target_fps=TARGET_FPS, profiler=profiler)
+        self.scheduler.add_stage("gesture", self._gesture_step, fps=DETECTION_FPS, priority=3, essential=True)
+        self.scheduler.add_stage("animation", self._animation_step, fps=ANIMATION_FPS, priority=2)
+        self.scheduler.add_stage("render", self._render_step, fps=RENDER_FPS, priority=1)
+        self.scheduler.add_stage("preview", self._preview_step, fps=PREVIEW_FPS, priority=0)
+        self.scheduler.add_stage("overlay", self._overlay_step, fps=4, priority=-1)
         self._update()
 
     def _build_ui(self):
-        # Left frame: tree + menu
-        left_frame = ttk.Frame(self.root)
-        left_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-        left_frame.grid_rowconfigure(0, weight=1)
-        left_frame.grid_rowconfigure(1, weight=0)
-        left_frame.grid_rowconfigure(2, weight=0)
-        left_frame.grid_columnconfigure(0, weight=1)
-
-        # Tree canvas
-        self.tree_canvas = tk.Canvas(left_frame, width=600, height=580)
-        self.tree_canvas.grid(row=0, column=0, sticky="ns")
-
-        # Ornament menu canvas
-        self.menu_canvas = tk.Canvas(left_frame, width=600, height=70)
-        self.menu_canvas.grid(row=1, column=0, sticky="ew")
-        self.menu = OrnamentMenu(self.menu_canvas)
-        self.menu.render(self.menu_canvas)
-
-        # Painting menu canvas (hidden initially)
-        self.painting_menu_canvas = tk.Canvas(left_frame, width=600, height=70)
-        self.painting_menu_canvas.grid(row=2, column=0, sticky="ew")
-        self.painting_menu_canvas.grid_remove()  # start hidden
-
-        # Initialize the PaintingMenu instance ONCE
-        self.painting_menu = PaintingMenu(self.painting_menu_canvas, self.painting_paths)
+        # Left: tree + menus of each user, side by side like the camera bands
+        self.panels = [UserPanel(self.root, i, manager, self.painting_paths)
+                       for i, manager in enumerate(self.managers)]
+        self.renderer = self.panels[0].renderer
 
         # Right frame: camera preview + controls
         right_frame = ttk.Frame(self.root)
-        right_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
+        right_frame.grid(row=0, column=len(self.panels), sticky="nsew", padx=10, pady=10)
         right_frame.grid_rowconfigure(0, weight=1)
         right_frame.grid_columnconfigure(0, weight=1)
 
         self.preview_label = ttk.Label(right_frame)
         self.preview_label.grid(row=0, column=0, sticky="nsew", pady=5)
+        if not SHOW_PREVIEW:
+            self.preview_label.grid_remove()
 
         self.mode_var = tk.StringVar(value="Idle")
         ttk.Label(right_frame, textvariable=self.mode_var).grid(row=1, column=0, pady=5)
 
         self.start_btn = ttk.Button(right_frame, text="Start Hand Detection",
-                                   command=self.toggle_camera)
+                                   command=self.toggle_camera, state="disabled")
         self.start_btn.grid(row=2, column=0, pady=5)
+        self.mode_var.set("Loading camera and hand model...")
+
+        # Timing overlay ('p' toggles it, 't' exports a trace)
+        self.overlay_var = tk.StringVar(value="")
+        self.overlay_label = ttk.Label(right_frame, textvariable=self.overlay_var,
+                                       font=("Courier", 10), justify="left")
+        self.overlay_label.grid(row=3, column=0, sticky="w", pady=5)
+        if not PROFILE:
+            self.overlay_label.grid_remove()
+
+    def _warm_up(self, replay_path, replay_realtime, replay_detections):
+        """Background thread: artwork CDFs, heavy imports, camera open and model construction."""
+        camera = detector = None
+        try:
+            self.manager.cdf_cache.preload(self.painting_paths)
+            if replay_path:
+                from vision.recording import Recording, ReplaySource
+                camera = ReplaySource(Recording(replay_path), realtime=replay_realtime)
+            else:
+                from vision.camera_thread import CameraThread
+                camera = CameraThread()
+            detector_options = dict(track_roi=HAND_TRACK_ROI, inference_size=HAND_INFERENCE_SIZE,
+                                    detect_every=HAND_DETECT_EVERY)
+            if replay_path and replay_detections:
+                from vision.recording import ReplayDetector
+                detector = ReplayDetector(camera, annotate=False)
+            elif USE_INFERENCE_WORKER and self.users == 1:
+                from vision.inference_worker import InferenceWorker
+                detector = InferenceWorker(annotate=False, **detector_options)
+            else:
+                from vision.hand_detector import HandGesture
+                detector = HandGesture(annotate=False, max_num_hands=self.users, **detector_options)
+        except Exception as e:
+            self.warmup_error = e
+            if camera is not None:
+                camera.release()
+        else:
+            with self._warmup_lock:
+                closing = self._closing
+                if not closing:
+                    self.camera, self.detector = camera, detector
+            if closing:  # window closed while warming up
+                camera.release()
+                detector.close()
+        self._warmup_done.set()
+
+    def _report_window_ready(self):
+        print(f"Window ready in {(time.perf_counter() - self.started_at) * 1000:.0f} ms")
+
+    def _poll_warm_up(self):
+        """Tk side of the warm-up: enable detection once the camera and model exist."""
+        if not self._warmup_done.is_set():
+            self.root.after(50, self._poll_warm_up)
+            return
+        if self.warmup_error is not None:
+            print("Hand detection unavailable:", self.warmup_error)
+            self.mode_var.set("Hand detection unavailable")
+            return
+        print(f"Hand detection ready in {(time.perf_counter() - self.started_at) * 1000:.0f} ms")
+        self.mode_var.set("Idle")
+        self.start_btn.config(state="normal")
 
     def toggle_camera(self):
+        if self.camera is None:
+            return
         if not self.camera.running:
-            self.camera.start()
+            if not self.camera.start():
+                self.mode_var.set("Camera still stopping, try again")
+                return
             self.start_btn.config(text="Stop Detection")
         else:
             self.camera.stop()
             self.mode_var.set("Idle")
             self.start_btn.config(text="Start Hand Detection")
 
-    def _random_position(self):
-        return (random.randint(50, 550), random.randint(80, 520))
+    def _toggle_profiler(self):
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            profiler.reset()
+            self.overlay_label.grid()
+        else:
+            self.overlay_label.grid_remove()
+
+    def _export_trace(self):
+        path = os.path.join(ROOT, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        profiler.export_trace(path)
+        print("Trace written to", path)
+
+    def _overlay_step(self):
+        if profiler.enabled:
+            self.overlay_var.set(profiler.summary())
+
+    def _on_close(self):
+        with self._warmup_lock:
+            self._closing = True
+            camera, detector = self.camera, self.detector
+        # anything the warm-up finishes from now on is released by the warm-up itself
+        if camera is not None:
+            camera.release()
+        if detector is not None:
+            detector.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.root.destroy()
 
     def _on_key(self, event):
-        if event.char in "12345":
+        if event.char == "p":
+            self._toggle_profiler()
+        elif event.char == "t":
+            self._export_trace()
+        elif event.char == "v":
+            self._toggle_preview()
+        elif event.char and event.char in "12345":
             idx = int(event.char)
-            self._manual_add(idx)
-
-    def _manual_add(self, idx):
-        """Keyboard/manual selection"""
-        pos = self._random_position()
-        ref_image = None
-        if idx == 3:
-            # Enter painting selection mode
-            self.mode = "painting"
-            self.painting_menu_canvas.grid()
-            self.painting_menu.render(self.painting_menu_canvas) # Use existing instance
-            return
-        ornament = self.manager.create_ornament(idx, pos, ref_image)
-        self.manager.add(ornament)
-        self.renderer.render(self.tree_canvas)
+            self.controller.manual_add(idx)
 
-    def _finger_stable(self, count):
-        now = time.time()
-        if self.last_finger_count != count:
-            self.last_finger_count = count
-            self.finger_stable_since = now
-            return False
-        return (now - self.finger_stable_since) >= self.required_stable_time
-
-    def _handle_ornament_mode(self, count, hand_detected):
-        if not hand_detected or not self._finger_stable(count):
-            # If hand is not stable, or not detected, ensure painting menu is hidden
-            if self.painting_menu_canvas.winfo_ismapped():
-                self.painting_menu_canvas.grid_remove()
-            return
+    def _toggle_preview(self):
+        self.show_preview = not self.show_preview
+        self.pending_preview = None
+        if self.show_preview:
+            self.preview_label.grid()
+        else:
+            self.preview_label.grid_remove()
+
+    def _clear_preview(self):
+        if self.preview_photo is not None:
+            self.preview_label.config(image="")
+            self.preview_photo = None
+
+    def _update_preview(self, frame, rgb=None, hands=()):
+        """
+        Downsample to the preview width first, then convert and draw on the small
+        image, and paste it into the persistent PhotoImage.
+        frame: mirrored BGR camera frame; rgb: the detector's RGB copy of it, if any;
+        hands: (21, 3) normalized landmarks of each hand to draw
+        """
+        h, w = frame.shape[:2]
+        size = (PREVIEW_WIDTH, max(1, PREVIEW_WIDTH * h // w))
+        if rgb is not None:
+            small = cv2.resize(rgb, size, interpolation=cv2.INTER_LINEAR)
+        else:
+            small = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2RGB)
+        for landmarks in hands:
+            draw_hand(small, landmarks, point_color=(255, 0, 0))  # RGB order
+
+        image = Image.fromarray(small)
+        if self.preview_photo is None or (self.preview_photo.width(), self.preview_photo.height()) != size:
+            self.preview_photo = ImageTk.PhotoImage(image)
+            self.preview_label.config(image=self.preview_photo)
+        else:
+            self.preview_photo.paste(image)
 
-        now = time.time()
-        if now - self.last_add_time < self.add_cooldown:
+    def _gesture_step(self):
+        if self.camera is None:
+            return  # still warming up
+        if not self.camera.running:
+            self.pending_preview = None
+            self._clear_preview()
+            self.mode_var.set("Idle")
             return
 
-        if count == 0:
-            last = self.manager.remove_last()
-            self.last_add_time = now
-            if last:
-                self.menu.select(last.type_id - 1, self.menu_canvas, color="red")
-            
-            # Hide painting menu if it was accidentally visible
-            if self.painting_menu_canvas.winfo_ismapped():
-                 self.painting_menu_canvas.grid_remove()
-                 
-        elif count == 3:
-            # Enter painting selection
-            self.mode = "painting"
-            
-            # Check if the canvas is already visible to avoid unnecessary render calls
-            if not self.painting_menu_canvas.winfo_ismapped():
-                self.painting_menu_canvas.grid()
-                self.painting_menu.render(self.painting_menu_canvas) # RENDER ONLY ONCE ON MODE ENTRY
-
-            # Reset the selection upon entering the mode
-            if self.painting_menu.selected_index is not None:
-                self.painting_menu.select(None, self.painting_menu_canvas)
-                
-        else:
-            self.manager.add_ornament_random(count)
-            self.last_add_time = now
-            self.menu.select(count - 1, self.menu_canvas, color="green")
-            
-            # Hide painting menu if it was accidentally visible
-            if self.painting_menu_canvas.winfo_ismapped():
-                 self.painting_menu_canvas.grid_remove()
-
-    def _handle_painting_mode(self, count, hand_detected):
-        if not self.painting_menu or not self._finger_stable(count):
+        # Latest captured frame; never waits for the camera
+        packet = self.camera.latest()
+        if packet is None or packet.seq == self.last_frame_seq:
             return
-            
-        now = time.time()
-        n = len(self.painting_paths)
-        
-        # 1. Selection logic (Hand is present, count is 1 to N)
-        if hand_detected and 1 <= count <= n:
-            idx = count - 1
-            # Select the painting based on the finger count (1 to N)
-            self.painting_menu.select(idx, self.painting_menu_canvas)
-            
-        # 2. Confirmation/Cancellation logic (Hand is closed OR hand disappears)
-        # We use a stable count of 0 (either closed hand or no hand detected)
-        elif count == 0 and now - self.last_add_time >= self.add_cooldown:
-            
-            if self.painting_menu.selected_index is not None:
-                # Add the selected ornament
-                selected_idx = self.painting_menu.selected_index
-                
-                # Check if the path exists before attempting to open
-                if os.path.exists(self.painting_paths[selected_idx]):
-                    ref_img = Image.open(self.painting_paths[selected_idx])
-                    self.manager.add_ornament_random(3,ref_image=ref_img)
-                    self.renderer.render(self.tree_canvas)
-                    self.menu.select(3 - 1, self.menu_canvas, color="green")
-                else:
-                    print(f"Error: Painting file not found at {self.painting_paths[selected_idx]}.")
-            
-            # Transition back to ornament mode (happens regardless of whether an item was added)
-            self.painting_menu_canvas.grid_remove()
-            self.mode = "ornament"
-            self.last_add_time = now
-
-        # If the hand is detected but the finger count is > N (out of selection range),
-        # or if the hand is not detected but the count is not stable, we do nothing.
-
-    def _update_preview(self, frame):
-        try:
-            img = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
-            self.preview_label.imgtk = img
-            self.preview_label.config(image=img)
-        except Exception as e:
-            print("Preview update failed:", e)
+        self.last_frame_seq = packet.seq
+        frame = packet.image
+        if self.cam_width is None:
+            h, w, _ = frame.shape
+            self.cam_width = w
+            self.cam_height = h
+
+        if self.multi_user is not None:
+            self._gesture_step_hands(packet)
+            return
+        with profiler.stage("detect"):
+            if hasattr(self.detector, "submit"):  # InferenceWorker: results carry the camera seq
+                count, mirrored, tip = self.detector.process(frame, seq=packet.seq)
+            else:
+                count, mirrored, tip = self.detector.process(frame)
+        hand_detected = tip is not None
+        if self.recorder is not None:
+            self.recorder.write_result(packet, self.detector, count, tip)
+        if self.show_preview:
+            # shown by the preview stage at its own rate
+            landmarks = self.detector.last_landmarks
+            self.pending_preview = (mirrored, getattr(self.detector, "last_rgb", None),
+                                    () if landmarks is None else (landmarks,))
+
+        # Update mode variable for display before handling mode logic
+        mode = self.controller.mode
+        self.mode_var.set(f"Mode: {mode.capitalize()} | Fingers: {count}" if hand_detected else "No hand detected")
+
+        self.controller.handle(count, hand_detected)
+
+    def _gesture_step_hands(self, packet):
+        """Several users: every hand found in one model pass drives its band's controller."""
+        with profiler.stage("detect"):
+            mirrored, hands = self.detector.process_hands(packet.image)
+        if self.recorder is not None:  # the recording keeps the leftmost hand
+            first = hands[0] if hands else None
+            self.recorder.write_result(packet, self.detector, first.finger_count if first else 0,
+                                       first.index_tip_pos if first else None)
+        if self.show_preview:
+            self.pending_preview = (mirrored, self.detector.last_rgb, [hand.landmarks for hand in hands])
+
+        assigned = self.multi_user.handle_hands(hands)
+        self.mode_var.set(" | ".join(
+            f"User {i + 1}: {controller.mode.capitalize()}, {hand.finger_count} fingers" if hand else
+            f"User {i + 1}: no hand" for i, (controller, hand) in enumerate(zip(self.controllers, assigned))))
+
+    def _preview_step(self):
+        if self.pending_preview is None:
+            return
+        if self.show_preview and self.root.state() != "iconic":  # nothing to show when minimized
+            self._update_preview(*self.pending_preview)
+        self.pending_preview = None
 
-    def _update(self):
-        if self.camera.running:
-            frame = self.camera.read_frame()
-            if frame is not None and self.cam_width is None:
-                h, w, _ = frame.shape
-                self.cam_width = w
-                self.cam_height = h
-            if frame is not None:
-                count, annotated, tip = self.detector.process(frame)
-                hand_detected = tip is not None
-                self._update_preview(annotated)
-                
-                # Update mode variable for display before handling mode logic
-                self.mode_var.set(f"Mode: {self.mode.capitalize()} | Fingers: {count}" if hand_detected else "No hand detected")
-
-                if self.mode == "ornament":
-                    self._handle_ornament_mode(count, hand_detected)
-                elif self.mode == "painting":
-                    self._handle_painting_mode(count, hand_detected)
+    def _animation_step(self):
+        for manager in self.managers:
+            manager.update()
 
-        else:
-            self.preview_label.config(image="")
-            self.mode_var.set("Idle")
+    def _render_step(self):
+        for panel in self.panels:
+            panel.render()
 
-        self.manager.update()
-        self.renderer.render(self.tree_canvas)
-        self.root.after(30, self._update)
+    def _update(self):
+        delay = self.scheduler.tick()
+        self.root.after(delay, self._update)
 
     def run(self):
         self.root.mainloop()
\ No newline at end of file
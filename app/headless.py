@@ -0,0 +1,224 @@
+# app/headless.py
+# Runs the decorate loop without Tk: frame source -> detector -> gesture controller
+# -> OrnamentManager -> Compositor, as fast as the CPU allows on a simulated clock.
+#   python headless.py --replay DIR [--recorded-detections] --video out.mp4
+#   python headless.py --script "1,1,2,-,3,2,0" --hold 20 --snapshot tree.png
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+from utils.assets import get_sprite
+from gui.compositor import Compositor
+from gui.gesture_controller import GestureController, MultiUserController
+from ornaments.manager import OrnamentManager
+from utils.config import ASSETS_PATH
+
+
+class SimulatedClock:
+    """Clock that only moves when advanced: every tick lasts exactly 1/fps seconds."""
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class ScriptedGestures:
+    """
+    Gesture sequence without a camera: each entry is a finger count (or None for
+    "no hand") held for `hold` ticks.
+    """
+    def __init__(self, counts, hold=15):
+        self.counts = list(counts)
+        self.hold = hold
+        self.tick = 0
+
+    @classmethod
+    def parse(cls, text, hold=15):
+        """"1,1,-,3,2,0" -> counts; '-' means no hand in view."""
+        return cls([None if c.strip() == "-" else int(c) for c in text.split(",")], hold)
+
+    def __len__(self):
+        return len(self.counts) * self.hold
+
+    def next(self):
+        """(finger_count, hand_detected), or None when the script is over."""
+        if self.tick >= len(self):
+            return None
+        count = self.counts[self.tick // self.hold]
+        self.tick += 1
+        return (0, False) if count is None else (count, True)
+
+
+class HeadlessRunner:
+    """
+    Drives GestureController and OrnamentManager exactly like MainWindow does,
+    without a display.
+    - source + detector: frames from a CameraThread/ReplaySource and a HandGesture,
+      InferenceWorker or ReplayDetector; or gestures: a ScriptedGestures
+    - clock: SimulatedClock (default, advanced by 1/fps per tick) or a real clock
+    - video_path: write the composed frames to a video file
+    - on_frame: callback(rgba ndarray) per tick; the buffer is reused, copy to keep it
+    - users: trees decorated at once, one per band of the camera frame; the
+      detector must provide process_hands() (HandGesture with max_num_hands=users)
+      and the trees are laid out side by side in the output frame
+    """
+    def __init__(self, source=None, detector=None, gestures=None, clock=None, fps=30,
+                 video_path=None, on_frame=None, seed=None, painting_paths=None, users=1):
+        if users > 1 and gestures is not None:
+            raise ValueError("Scripted gestures drive a single user")
+        self.source = source
+        self.detector = detector
+        self.gestures = gestures
+        self.clock = clock or SimulatedClock()
+        self.fps = fps
+        self.on_frame = on_frame
+
+        tree = get_sprite("tree.png", (600, 580))
+        if painting_paths is None:
+            painting_paths = [os.path.join(ASSETS_PATH, "artworks", f"artwork{i}.jpeg") for i in range(1, 5)]
+        self.managers, self.controllers, self.compositors = [], [], []
+        for user in range(users):
+            manager = OrnamentManager()
+            if seed is not None:
+                manager.rng = np.random.default_rng(seed + user)
+            manager.set_tree(tree)
+            manager.cdf_cache.preload(painting_paths)
+            self.managers.append(manager)
+            self.controllers.append(GestureController(manager, painting_paths, clock=self.clock))
+            self.compositors.append(Compositor(tree.size))
+        self.manager, self.controller, self.compositor = self.managers[0], self.controllers[0], self.compositors[0]
+        self.multi_user = MultiUserController(self.controllers) if users > 1 else None
+
+        w, h = tree.size
+        self.writer = None
+        if video_path:
+            self.writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w * users, h))
+        self.frame = np.zeros((h, w * users, 4), dtype=np.uint8) if users > 1 else None
+        self.ticks = 0
+        self.last_frame_seq = None
+
+    def _gesture(self):
+        """
+        (finger_count, hand_detected) for this tick (a list of HandResult with several
+        users), None without a new frame, False when the input is exhausted.
+        """
+        if self.gestures is not None:
+            gesture = self.gestures.next()
+            return False if gesture is None else gesture
+
+        if not self.source.running:
+            return False
+        packet = self.source.latest()
+        if packet is None:
+            return None if self.source.running else False
+        if packet.seq == self.last_frame_seq:
+            return None  # no new frame yet
+        self.last_frame_seq = packet.seq
+        if self.multi_user is not None:
+            return self.detector.process_hands(packet.image)[1]
+        count, _, tip = self.detector.process(packet.image)
+        return count, tip is not None
+
+    def tick(self):
+        """One loop iteration; returns False once the frame source or script has ended."""
+        gesture = self._gesture()
+        if gesture is False:
+            return False
+        if gesture is not None and self.multi_user is not None:
+            self.multi_user.handle_hands(gesture)
+        elif gesture is not None:
+            self.controller.handle(*gesture)
+
+        if self.multi_user is None:
+            self.manager.update()
+            self.frame = self.compositor.compose(self.manager.current_tree, self.manager.ornaments)
+        else:
+            w = self.frame.shape[1] // len(self.managers)
+            for i, (manager, compositor) in enumerate(zip(self.managers, self.compositors)):
+                manager.update()
+                self.frame[:, i * w:(i + 1) * w] = compositor.compose(manager.current_tree, manager.ornaments)
+        if self.writer is not None:
+            self.writer.write(cv2.cvtColor(self.frame, cv2.COLOR_RGBA2BGR))
+        if self.on_frame is not None:
+            self.on_frame(self.frame)
+
+        self.ticks += 1
+        if isinstance(self.clock, SimulatedClock):
+            self.clock.advance(1.0 / self.fps)
+        return True
+
+    def run(self, max_ticks=None):
+        """Tick until the input ends (or max_ticks); returns throughput stats."""
+        if self.source is not None:
+            self.source.start()
+        start = time.perf_counter()
+        while max_ticks is None or self.ticks < max_ticks:
+            if not self.tick():
+                break
+        elapsed = time.perf_counter() - start
+        return {"ticks": self.ticks, "seconds": elapsed,
+                "ticks_per_second": self.ticks / elapsed if elapsed > 0 else 0.0,
+                "ornaments": sum(len(m.ornaments) for m in self.managers)}
+
+    def snapshot(self, path):
+        """Save the last composed frame as an image file."""
+        cv2.imwrite(path, cv2.cvtColor(self.frame, cv2.COLOR_RGBA2BGRA))
+
+    def close(self):
+        if self.source is not None:
+            self.source.release()
+        if self.detector is not None:
+            self.detector.close()
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Gesture Tree Decorator")
+    parser.add_argument("--replay", metavar="DIR", help="recorded session to use as frame source")
+    parser.add_argument("--recorded-detections", action="store_true",
+                        help="replay the recorded hand landmarks instead of running MediaPipe")
+    parser.add_argument("--script", help='finger counts instead of frames, e.g. "1,1,-,3,2,0" (- = no hand)')
+    parser.add_argument("--hold", type=int, default=15, help="ticks each scripted count is held")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--users", type=int, default=1,
+                        help="users decorating side by side trees from one camera (needs --replay)")
+    parser.add_argument("--video", help="write the decorated tree to this video file")
+    parser.add_argument("--snapshot", help="save the final frame to this image file")
+    args = parser.parse_args()
+    if not args.replay and not args.script:
+        parser.error("one of --replay or --script is required")
+    if args.users > 1 and (args.script or args.recorded_detections):
+        parser.error("--users needs live detection on --replay frames")
+
+    clock = SimulatedClock()
+    source = detector = gestures = None
+    if args.script:
+        gestures = ScriptedGestures.parse(args.script, args.hold)
+    else:
+        from vision.recording import Recording, ReplaySource, ReplayDetector
+        source = ReplaySource(Recording(args.replay), realtime=True, clock=clock)
+        if args.recorded_detections:
+            detector = ReplayDetector(source, annotate=False)
+        else:
+            from vision.hand_detector import HandGesture
+            detector = HandGesture(annotate=False, max_num_hands=args.users)
+
+    runner = HeadlessRunner(source, detector, gestures, clock=clock, fps=args.fps,
+                            video_path=args.video, seed=args.seed, users=args.users)
+    try:
+        stats = runner.run(args.ticks)
+    finally:
+        runner.close()
+    if args.snapshot and runner.frame is not None:
+        runner.snapshot(args.snapshot)
+    print(f"{stats['ticks']} ticks in {stats['seconds']:.2f} s "
+          f"({stats['ticks_per_second']:.1f} ticks/s), {stats['ornaments']} ornaments")
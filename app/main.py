@@ -1,5 +1,27 @@
 # app/main.py
+import time
+STARTED_AT = time.perf_counter()  # before the heavy imports, for the startup report
+
+import argparse
 from gui.window import MainWindow
+from utils.config import USERS
 
 if __name__ == "__main__":
-    MainWindow().run()
+    parser = argparse.ArgumentParser(description="Gesture Tree Decorator")
+    parser.add_argument("--record", metavar="DIR",
+                        help="record camera frames and detection results to DIR")
+    parser.add_argument("--replay", metavar="DIR",
+                        help="play back a recorded session instead of using the webcam")
+    parser.add_argument("--max-speed", action="store_true",
+                        help="replay one frame per update instead of at the recorded pace")
+    parser.add_argument("--recorded-detections", action="store_true",
+                        help="replay the recorded hand landmarks instead of running MediaPipe")
+    parser.add_argument("--users", type=int, default=USERS,
+                        help="users decorating side by side trees from one camera")
+    args = parser.parse_args()
+    if args.users > 1 and args.recorded_detections:
+        parser.error("--users needs live hand detection")
+    MainWindow(record_path=args.record, replay_path=args.replay,
+               replay_realtime=not args.max_speed,
+               replay_detections=args.recorded_detections,
+               started_at=STARTED_AT, users=args.users).run()
@@ -0,0 +1,98 @@
+# app/ornaments/animation.py
+from collections import OrderedDict
+import numpy as np
+from ornaments.effects import apply_blur, stack_to_images
+
+BLUR_CACHE_SIZE = 512  # blurred frames kept, least recently used dropped first
+_blurred = OrderedDict()  # {(frame key, ksize): blurred frame}
+
+def blurred_frame(frame, ksize, key):
+    """
+    Blurred copy of a shared frame, computed once per (key, ksize).
+    key names the frame stably, e.g. (ornament type, animation state); the
+    cache is bounded, so past blur levels do not accumulate as balls come and go.
+    """
+    if not ksize:
+        return frame
+    entry = (key, ksize)
+    blurred = _blurred.get(entry)
+    if blurred is None:
+        blurred = _blurred[entry] = apply_blur(frame, ksize)
+        if len(_blurred) > BLUR_CACHE_SIZE:
+            _blurred.popitem(last=False)
+    else:
+        _blurred.move_to_end(entry)
+    return blurred
+
+
+class AnimationCycle:
+    """Frames of one animation period, rendered once and shared by every instance."""
+    def __init__(self, frames, loop_start=0):
+        self.frames = frames
+        self.loop_start = loop_start
+        # next_table[i] == next_index(i), to advance many indices at once
+        self.next_table = np.append(np.arange(1, len(frames), dtype=np.int32), np.int32(loop_start))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def next_index(self, index):
+        index += 1
+        if index >= len(self.frames):
+            index = self.loop_start
+        return index
+
+
+class Animation:
+    """
+    Periodic ornament animation described as a small state machine.
+    - initial: starting state (tuple of numbers, the first one is the effect value)
+    - step: function(state) -> next state
+    - render: function(image, value) -> rendered frame
+    - render_batch: optional function(image, values) -> (N, H, W, C) stack, used to
+      render the whole cycle in one pass (frames are then views of the stack)
+    The states are walked until one repeats, and each distinct state is
+    rendered once per sprite size, so update() only has to advance an index.
+    """
+    def __init__(self, initial, step, render, render_batch=None, precision=6, max_steps=10000):
+        self.initial = initial
+        self.step = step
+        self.render = render
+        self.render_batch = render_batch
+        self.precision = precision  # rounding used to detect float states repeating
+        self.max_steps = max_steps
+        self._cycles = {}           # {sprite size: AnimationCycle}
+
+    def _key(self, state):
+        return tuple(round(v, self.precision) for v in state)
+
+    def states(self):
+        """Return (states, loop_start) for one full period of the state machine."""
+        states = []
+        seen = {}
+        state = self.initial
+        while self._key(state) not in seen:
+            if len(states) >= self.max_steps:
+                raise RuntimeError("Animation does not repeat within max_steps")
+            seen[self._key(state)] = len(states)
+            states.append(state)
+            state = self.step(state)
+        return states, seen[self._key(state)]
+
+    def cycle_for(self, image):
+        cycle = self._cycles.get(image.size)
+        if cycle is None:
+            states, loop_start = self.states()
+            # a value reached in both directions is rendered once
+            values = {}
+            for state in states:
+                values.setdefault(round(state[0], self.precision), state[0])
+            if self.render_batch is not None:
+                images = stack_to_images(self.render_batch(image, list(values.values())))
+            else:
+                images = [self.render(image, v) for v in values.values()]
+            rendered = dict(zip(values, images))
+            frames = [rendered[round(state[0], self.precision)] for state in states]
+            cycle = AnimationCycle(frames, loop_start)
+            self._cycles[image.size] = cycle
+        return cycle
@@ -2,10 +2,9 @@
 from ornaments.ornament import Ornament
 
 class DecorativeBall(Ornament):
-    def __init__(self, position):
-        # type_id = 4 (your system)
-        super().__init__(4, position)
-        self.blur_strength = 1  # contributes to global blur
+    __slots__ = ()
+    TYPE_ID = 4
+    blur_strength = 1  # contributes to global blur, and stays sharp itself
 
-    def update(self):
-        pass  # ball stays sharp
+    def __init__(self, position):
+        super().__init__(self.TYPE_ID, position)
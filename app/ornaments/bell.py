@@ -1,19 +1,22 @@
-# app/ornaments/garland.py
+# app/ornaments/bell.py
 from ornaments.ornament import Ornament
-from ornaments.effects import apply_mosaic
+from ornaments.animation import Animation
+from ornaments.effects import apply_mosaic, apply_mosaic_batch
 
-class Bell(Ornament):
-    def __init__(self, position):
-        super().__init__(type_id=2, position=position)
-        self.scale = 0.05
-        self.direction = 0.002
+def _oscillate(state):
+    scale, direction = state
 
-    def update(self):
-        self.image = apply_mosaic(self.original_image, scale=self.scale)
-        
-        # oscillate pixelation level
-        self.scale += self.direction
-        if self.scale > 0.1 or self.scale < 0.03:
-            self.direction *= -1
+    # oscillate pixelation level
+    scale += direction
+    if scale > 0.1 or scale < 0.03:
+        direction *= -1
+    return scale, direction
 
-        
\ No newline at end of file
+class Bell(Ornament):
+    __slots__ = ()
+    TYPE_ID = 2
+    animation = Animation(initial=(0.05, 0.002), step=_oscillate, render=apply_mosaic,
+                          render_batch=apply_mosaic_batch)
+
+    def __init__(self, position):
+        super().__init__(type_id=self.TYPE_ID, position=position)
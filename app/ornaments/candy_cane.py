@@ -1,17 +1,21 @@
 # app/ornaments/candy_cane.py
 from ornaments.ornament import Ornament
-from ornaments.effects import apply_contrast
+from ornaments.animation import Animation
+from ornaments.effects import apply_contrast, apply_contrast_batch
 
-class CandyCane(Ornament):
-    def __init__(self, position):
-        super().__init__(type_id=1, position=position)
-        self.contrast = 1.0
+def _ramp(state):
+    contrast, = state
+    contrast += 0.02
+    if contrast > 2.0:
+        contrast = 1.0
+    return (contrast,)
 
-    def update(self):
-        # Apply contrast relative to the original sprite
-        self.image = apply_contrast(self.original_image, self.contrast)
+class CandyCane(Ornament):
+    __slots__ = ()
+    TYPE_ID = 1
+    # Contrast is applied relative to the original sprite
+    animation = Animation(initial=(1.0,), step=_ramp, render=apply_contrast,
+                          render_batch=apply_contrast_batch)
 
-        # Update contrast
-        self.contrast += 0.02
-        if self.contrast > 2.0:
-            self.contrast = 1.0
+    def __init__(self, position):
+        super().__init__(type_id=self.TYPE_ID, position=position)
@@ -0,0 +1,110 @@
+# app/ornaments/effect_graph.py
+from ornaments.effects import apply_lut, compose_luts
+
+
+class EffectNode:
+    """
+    One step of an EffectGraph.
+    - apply: function(image, **params) -> image, or
+    - lut: function(**params) -> 256-entry table (None = identity); consecutive
+      lut nodes are fused into a single pass
+    - key: function(params) -> hashable memo key (defaults to the sorted params)
+    """
+    def __init__(self, name, apply=None, lut=None, key=None, memo_size=8, **params):
+        self.name = name
+        self.apply = apply
+        self.lut = lut
+        self.key = key or (lambda p: tuple(sorted(p.items())))
+        self.params = params
+        self.memo_size = memo_size
+        self.memo = {}   # {params key: output} for the current input
+
+    def memo_key(self):
+        return self.key(self.params)
+
+
+class EffectGraph:
+    """
+    Linear chain source -> node -> node ... with memoized outputs.
+    Changing a node's parameters only marks the suffix starting at that node
+    dirty; output() recomputes that suffix and nothing else.
+    """
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self.source = None
+        self._outputs = [None] * len(self.nodes)
+        self._dirty = 0  # index of the first node to recompute, None when clean
+
+    @property
+    def dirty(self):
+        return self._dirty is not None
+
+    def _mark(self, index):
+        self._dirty = index if self._dirty is None else min(self._dirty, index)
+        # memoized results of downstream nodes were computed from a different input
+        for node in self.nodes[index + 1:]:
+            node.memo.clear()
+
+    def set_source(self, image):
+        self.source = image
+        for node in self.nodes:
+            node.memo.clear()
+        self._dirty = 0
+
+    def node(self, name):
+        return next(n for n in self.nodes if n.name == name)
+
+    def set_params(self, name, **params):
+        """Update a node's parameters; no-op if its memo key does not change."""
+        index = next(i for i, n in enumerate(self.nodes) if n.name == name)
+        node = self.nodes[index]
+        old_key = node.memo_key()
+        node.params.update(params)
+        if node.memo_key() != old_key:
+            self._mark(index)
+
+    def _run(self, node, image):
+        key = node.memo_key()
+        if key in node.memo:
+            return node.memo[key]
+        result = node.apply(image, **node.params)
+        if len(node.memo) >= node.memo_size:
+            node.memo.pop(next(iter(node.memo)))
+        node.memo[key] = result
+        return result
+
+    def output(self):
+        """Final image, recomputing only the dirty suffix."""
+        if self.source is None:
+            return None
+        if self._dirty is None:
+            return self._outputs[-1] if self.nodes else self.source
+
+        # a fused group is recomputed as a whole: rewind to its first node
+        i = self._dirty
+        while i > 0 and self.nodes[i].lut is not None and self.nodes[i - 1].lut is not None:
+            i -= 1
+        image = self._outputs[i - 1] if i > 0 else self.source
+
+        while i < len(self.nodes):
+            node = self.nodes[i]
+            if node.lut is None:
+                image = self._run(node, image)
+                self._outputs[i] = image
+                i += 1
+                continue
+
+            # fuse consecutive point operations into one table
+            j, luts = i, []
+            while j < len(self.nodes) and self.nodes[j].lut is not None:
+                lut = self.nodes[j].lut(**self.nodes[j].params)
+                if lut is not None:
+                    luts.append(lut)
+                j += 1
+            if luts:
+                image = apply_lut(image, compose_luts(*luts))
+            self._outputs[i:j] = [image] * (j - i)
+            i = j
+
+        self._dirty = None
+        return image
@@ -1,4 +1,5 @@
 # app/ornaments/effects.py
+from functools import lru_cache
 from PIL import Image
 import cv2
 import numpy as np
@@ -22,6 +23,60 @@ def reattach_alpha(img_np, alpha):
     # Reattach alpha if needed
     if alpha is not None:
         return np.dstack((img_np, alpha))
+    return img_np
+
+# LOOKUP TABLES
+# Every per-pixel tone operation maps a uint8 value to a uint8 value, so it can be
+# described by a 256-entry table and applied to the whole image in one pass.
+IDENTITY_LUT = np.arange(256, dtype=np.uint8)
+IDENTITY_LUT.flags.writeable = False
+
+@lru_cache(maxsize=512)
+def brightness_lut(value=0):
+    """Table for apply_brightness: signed addition clipped to [0, 255]."""
+    lut = np.clip(np.arange(256, dtype=np.int16) + value, 0, 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+@lru_cache(maxsize=512)
+def contrast_lut(value=5):
+    """Table for apply_contrast: scaling computed in float32 then clipped to [0, 255]."""
+    lut = np.clip(np.arange(256, dtype=np.float32) * value, 0, 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+def compose_luts(*luts):
+    """
+    Fuse several tables into one, applied in the given order.
+    e.g. compose_luts(brightness_lut(20), contrast_lut(1.5), hist_lut)
+    """
+    fused = IDENTITY_LUT
+    for lut in luts:
+        fused = np.asarray(lut, dtype=np.uint8)[fused]
+    return fused
+
+def apply_lut(img, lut):
+    """
+    Apply a 256-entry uint8 table to the color channels in a single pass.
+    img: PIL.Image or numpy array (grayscale, RGB or RGBA). Alpha is left untouched.
+    Returns a PIL.Image like the other effects.
+    """
+    lut = np.asarray(lut, dtype=np.uint8)
+    if isinstance(img, Image.Image) and img.mode in ("L", "RGB", "RGBA"):
+        # PIL maps every band through its own 256 entries without leaving C
+        table = lut.tolist()
+        if img.mode == "RGB":
+            table = table * 3
+        elif img.mode == "RGBA":
+            table = table * 3 + IDENTITY_LUT.tolist()
+        return img.point(table)
+
+    img_np = img if isinstance(img, np.ndarray) else np.array(img)
+    if img_np.ndim == 3 and img_np.shape[2] == 4:
+        lut = np.dstack((lut, lut, lut, IDENTITY_LUT)).reshape(256, 1, 4)
+    elif img_np.ndim == 3 and img_np.shape[2] == 3:
+        lut = np.dstack((lut, lut, lut)).reshape(256, 1, 3)
+    return Image.fromarray(cv2.LUT(img_np, lut))
 
 def apply_brightness(img, value=0):
     """
@@ -29,27 +84,14 @@ def apply_brightness(img, value=0):
     img: PIL.Image
     value: signed integer, can be negative
     """
-    img_np, alpha = convert_to_np_array(img)
-    
-    # Convert to signed int16 temporarily
-    img_np = img_np.astype(np.int16)
-    img_np += value  # signed addition
-    img_np = np.clip(img_np, 0, 255).astype(np.uint8)  # clip to valid range
-
-    res = reattach_alpha(img_np, alpha)
-    return Image.fromarray(res)
+    return apply_lut(img, brightness_lut(value))
 
 def apply_contrast(img, value=5):
     """
     Adjust contrast of the image.
     alpha > 1 increases contrast, 0 < alpha < 1 decreases contrast.
     """
-    img_np, alpha = convert_to_np_array(img)
-    img_np = img_np.astype(np.float32)  # prevent clipping
-    img_np = img_np * value
-    img_np = np.clip(img_np, 0, 255).astype(np.uint8)
-    res = reattach_alpha(img_np, alpha)
-    return Image.fromarray(res)
+    return apply_lut(img, contrast_lut(value))
 
 def apply_blur(img, ksize=5):
     """
@@ -79,6 +121,50 @@ def apply_mosaic(img, scale=0.05):
 
     return Image.fromarray(mosaic)
 
+# BATCHED EFFECTS
+# The same sprite rendered with N parameter values at once, as an (N, H, W, C)
+# uint8 stack. Alpha is copied unchanged, like the single-image versions.
+
+def _stack_like(img_np, count):
+    stack = np.empty((count,) + img_np.shape, dtype=np.uint8)
+    if img_np.shape[2] == 4:
+        stack[..., 3] = img_np[:, :, 3]
+    return stack
+
+def apply_lut_batch(img, luts):
+    """Apply N tables (an (N, 256) array) to one image in a single broadcast lookup."""
+    img_np = np.asarray(img)
+    luts = np.asarray(luts, dtype=np.uint8)
+    stack = _stack_like(img_np, len(luts))
+    rows = np.arange(len(luts))[:, None, None, None]
+    stack[..., :3] = luts[rows, img_np[None, :, :, :3]]
+    return stack
+
+def apply_brightness_batch(img, values):
+    return apply_lut_batch(img, [brightness_lut(v) for v in values])
+
+def apply_contrast_batch(img, values):
+    return apply_lut_batch(img, [contrast_lut(v) for v in values])
+
+def apply_mosaic_batch(img, scales):
+    """Scales that give the same block grid share one computation."""
+    img_np = np.asarray(img)
+    h, w = img_np.shape[:2]
+    stack = _stack_like(img_np, len(scales))
+    by_grid = {}
+    for i, scale in enumerate(scales):
+        by_grid.setdefault((max(1, int(w * scale)), max(1, int(h * scale))), []).append(i)
+    for (new_w, new_h), rows in by_grid.items():
+        small = cv2.resize(img_np[:, :, :3], (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        stack[rows, :, :, :3] = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+    return stack
+
+def stack_to_images(stack):
+    """PIL images that are views of the stack's frames (no copy)."""
+    mode = "RGBA" if stack.shape[3] == 4 else "RGB"
+    h, w = stack.shape[1:3]
+    return [Image.frombuffer(mode, (w, h), frame, "raw", mode, 0, 1) for frame in stack]
+
 def apply_histogram_equalization(img):
     """
     Apply histogram equalization to improve contrast.
@@ -91,9 +177,38 @@ def apply_histogram_equalization(img):
         ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
         return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
 
+def channel_cdf(channel):
+    """Cumulative 256-bin histogram (pixel counts) of a uint8 channel."""
+    return np.cumsum(np.bincount(channel.ravel(), minlength=256))
+
+def cdf_match_lut(source_cdf, template_cdf):
+    """
+    Histogram specification as a 256-entry table, built from two cumulative
+    histograms (see channel_cdf). Can be fused with other tables via compose_luts.
+    """
+    # template values that actually occur and their normalized quantiles
+    t_values = np.flatnonzero(np.diff(template_cdf, prepend=0))
+    t_quantiles = np.asarray(template_cdf)[t_values].astype(np.float64)
+    t_quantiles /= t_quantiles[-1]
+
+    s_quantiles = np.asarray(source_cdf).astype(np.float64)
+    s_quantiles /= s_quantiles[-1]
+
+    lut = np.interp(s_quantiles, t_quantiles, t_values)
+    return np.clip(lut, 0, 255).astype(np.uint8)
+
 def _match_cdf(source_channel, template_channel):
     """Histogram specification (match) for a single-channel 2D array.
-       Uses unique-value CDF mapping (works for uint8)."""
+       uint8 input is matched with 256-bin histograms and a lookup table."""
+    if source_channel.dtype != np.uint8 or template_channel.dtype != np.uint8:
+        return _match_cdf_unique(source_channel, template_channel)
+
+    lut = cdf_match_lut(channel_cdf(source_channel), channel_cdf(template_channel))
+    return cv2.LUT(source_channel, lut)
+
+def _match_cdf_unique(source_channel, template_channel):
+    """Histogram specification (match) for a single-channel 2D array.
+       Uses unique-value CDF mapping (fallback for non-uint8 data)."""
     src = source_channel.ravel()
     tmpl = template_channel.ravel()
 
@@ -204,3 +319,33 @@ def apply_histogram_specification(src_img, ref_img, match_luminance=True, debug=
         result = np.clip(result, 0, 255).astype(np.uint8)
 
     return result
+
+def luminance_channel(img):
+    """Channel matched by apply_histogram_specification(match_luminance=True)."""
+    if img.ndim == 3 and img.shape[2] == 4:
+        img = img[:, :, :3]
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 1:
+        return img[:, :, 0]
+    return cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb)[:, :, 0]
+
+def luminance_cdf(img):
+    """Cumulative luminance histogram of a uint8 image, usable as a matching reference."""
+    return channel_cdf(luminance_channel(img))
+
+def specify_luminance(src_img, ref_cdf):
+    """
+    Same result as apply_histogram_specification(src_img, ref, match_luminance=True)
+    for a BGR/BGRA uint8 src_img, given ref_cdf = luminance_cdf(ref).
+    Lets callers keep the reference as 256 counts instead of a full image.
+    """
+    src = src_img[:, :, :3]
+    src_ycc = cv2.cvtColor(src, cv2.COLOR_BGR2YCrCb)
+    y = src_ycc[:, :, 0]
+    src_ycc[:, :, 0] = cdf_match_lut(channel_cdf(y), ref_cdf)[y]
+    result = cv2.cvtColor(src_ycc, cv2.COLOR_YCrCb2BGR)
+
+    if src_img.shape[2] == 4:
+        result = np.dstack((result, src_img[:, :, 3]))
+    return result
@@ -0,0 +1,76 @@
+# app/ornaments/histogram_cache.py
+import json
+import os
+import threading
+import numpy as np
+from PIL import Image
+from utils.config import ASSETS_PATH
+from ornaments.effects import luminance_cdf
+
+CACHE_PATH = os.path.join(ASSETS_PATH, "artworks_cdf_cache.json")
+
+class LuminanceCDFCache:
+    """
+    Luminance CDFs of the reference artworks, persisted next to assets/artworks.
+    Entries are keyed by file name and invalidated when the file's mtime or size changes.
+    Thread-safe: preload() can run in a background thread while get() is used.
+    """
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = self._load()
+        self._lock = threading.RLock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("Failed to save CDF cache:", self.path, e)
+
+    @staticmethod
+    def _stamp(path):
+        st = os.stat(path)
+        return [st.st_mtime, st.st_size]
+
+    def get(self, ref_image):
+        """Return the luminance CDF of a PIL reference image (cached when it has a file)."""
+        path = getattr(ref_image, "filename", None)
+        if not path or not os.path.exists(path):
+            return luminance_cdf(np.array(ref_image))
+
+        key = os.path.basename(path)
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["stamp"] == stamp:
+                return np.array(entry["cdf"], dtype=np.int64)
+
+            cdf = luminance_cdf(np.array(ref_image))
+            self.entries[key] = {"stamp": stamp, "cdf": cdf.tolist()}
+            self._save()
+        return cdf
+
+    def preload(self, paths):
+        """Compute and persist the CDFs of artworks not cached yet."""
+        with self._lock:
+            missing = False
+            for path in paths:
+                key = os.path.basename(path)
+                entry = self.entries.get(key)
+                if not os.path.exists(path) or (entry is not None and entry["stamp"] == self._stamp(path)):
+                    continue
+                with Image.open(path) as img:
+                    self.entries[key] = {"stamp": self._stamp(path),
+                                         "cdf": luminance_cdf(np.array(img)).tolist()}
+                missing = True
+            if missing:
+                self._save()
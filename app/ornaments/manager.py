@@ -1,5 +1,6 @@
-import random
-from ornaments.ornament import Ornament
+from ornaments.ornament import Ornament, OrnamentList, ornament_sprite
+from ornaments.scene import SceneStore
+import cv2
 import numpy as np
 from PIL import Image
 
@@ -10,35 +11,81 @@ from ornaments.painting import Painting
 from ornaments.bell import Bell
 from ornaments.ball import DecorativeBall
 # Import global effects
-from ornaments.effects import apply_blur
-from ornaments.effects import apply_contrast
-from ornaments.effects import apply_histogram_specification
+from ornaments.effects import contrast_lut
+from ornaments.effects import specify_luminance
+from ornaments.effect_graph import EffectGraph, EffectNode
+from ornaments.histogram_cache import LuminanceCDFCache
+from utils.profiler import profiler
+
+def _ref_key(ref_img):
+    """Memo key of a reference artwork: its file when known, else the image itself."""
+    if ref_img is None:
+        return None
+    return getattr(ref_img, "filename", None) or id(ref_img)
+
+def _tree_contrast_lut(value):
+    return None if value == 1.0 else contrast_lut(value)
 
 class OrnamentManager:
     def __init__(self):
-        self.ornaments = []
+        # One row per ornament in a struct-of-arrays table; self.ornaments gives
+        # Ornament handles on its rows
+        self.scene = SceneStore()
+        self.ornaments = OrnamentList(self.scene)
 
         self.tree_center_x = 300
         self.tree_bottom_y = 500
         self.tree_top_y = 70
         self.tree_width = 300
+        # Placement: valid positions from the tree's alpha; candidates are scored
+        # against the scene's position column in one vectorized step
+        self.placement_margin = 12      # pixels kept between a position and the foliage edge
+        self.placement_mask = None
+        self._valid_positions = None    # (M, 2) int array of (x, y) on the foliage
+        self.rng = np.random.default_rng()
+        # Global blur only depends on the set of balls, so it is tracked on add/remove
+        self.blur_power = 0
+        self.blur_ksize = 0
         # Tree images for global effects
         self.current_tree = None
         self.original_tree = None
-        self.global_contrast = 1.0  # start normal
+        self.global_contrast = 1.0  # start normal, +0.05 per candy cane (tracked on add/remove)
+        self.candy_canes = 0
+        self.cdf_cache = LuminanceCDFCache()
+        # Tree background: original -> histogram spec -> contrast.
+        # Each step is memoized and only rebuilt when a scene change touches it.
+        self.painting_refs = []  # reference images of the Paintings, in placement order
+        self.tree_graph = EffectGraph([
+            EffectNode("histogram", apply=self._match_histogram, ref=None,
+                       key=lambda p: _ref_key(p["ref"])),
+            EffectNode("contrast", lut=_tree_contrast_lut, value=self.global_contrast),
+        ])
 
     def set_tree(self, tree_img):
         self.original_tree = tree_img
-        self.current_tree = tree_img.copy()
+        self.tree_graph.set_source(tree_img)
+        self.current_tree = self.tree_graph.output()
+        self._build_placement_mask(tree_img)
+
+    def _build_placement_mask(self, tree_img):
+        """Foliage pixels (opaque, between top and bottom of the tree) away from the edges."""
+        if tree_img.mode != "RGBA":
+            return
+        mask = (np.asarray(tree_img)[:, :, 3] > 128).astype(np.uint8)
+        mask[:self.tree_top_y] = 0
+        mask[self.tree_bottom_y + 1:] = 0  # keep the trunk free
+        size = 2 * self.placement_margin + 1
+        mask = cv2.erode(mask, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size)))
+        ys, xs = np.nonzero(mask)
+        if len(xs) == 0:
+            return
+        self.placement_mask = mask.astype(bool)
+        self._valid_positions = np.column_stack((xs, ys))
 
     # CREATION
     def create_ornament(self, type_id, position, ref_image=None):
         if type_id == 1:
-            self.global_contrast += 0.05  # increase contrast per candy cane
-            # Cap contrast if needed
-            self.global_contrast = min(self.global_contrast, 3.0)
-            self.current_tree = apply_contrast(self.original_tree, self.global_contrast)
-            return CandyCane(position)  
+            return CandyCane(position)
         elif type_id == 2:
             return Bell(position)
         elif type_id == 3:
@@ -51,90 +98,111 @@ class OrnamentManager:
             return Ornament(type_id, position)
 
     def add(self, ornament):
-        self.ornaments.append(ornament)
+        # Move the ornament's row into the scene; the handle then points at it
+        fields = ornament.store.row(ornament.row)
+        ornament.bind(self.scene, self.scene.append(**fields))
+        if isinstance(ornament, DecorativeBall):
+            self._set_blur_power(self.blur_power + ornament.blur_strength)
+        if isinstance(ornament, CandyCane):
+            self._set_candy_canes(self.candy_canes + 1)
+        if isinstance(ornament, Painting) and ornament.ref_image is not None:
+            self.painting_refs.append(ornament.ref_image)
+            # Use the last added Painting as reference
+            self.tree_graph.set_params("histogram", ref=ornament.ref_image)
 
     # REMOVE
     def remove_last(self):
-        if self.ornaments:
-            return self.ornaments.pop()
+        if len(self.scene):
+            ornament = Ornament.detached(self.scene.pop())
+            if isinstance(ornament, DecorativeBall):
+                self._set_blur_power(self.blur_power - ornament.blur_strength)
+            if isinstance(ornament, CandyCane):
+                self._set_candy_canes(self.candy_canes - 1)
+            if isinstance(ornament, Painting) and ornament.ref_image is not None:
+                self.painting_refs.pop()
+                ref = self.painting_refs[-1] if self.painting_refs else None
+                self.tree_graph.set_params("histogram", ref=ref)
+            return ornament
         return None
 
 
     # RANDOM TREE PLACEMENT
+    def _sample_candidates(self, count):
+        if self._valid_positions is not None:
+            idx = self.rng.integers(0, len(self._valid_positions), count)
+            return self._valid_positions[idx]
+
+        # No tree mask: fall back to the triangle under the tree's outline
+        half_width = self.tree_width // 2
+        x = self.rng.integers(self.tree_center_x - half_width, self.tree_center_x + half_width + 1, count)
+        y_min = self.tree_top_y + (
+            np.abs(x - self.tree_center_x) / half_width * (self.tree_bottom_y - self.tree_top_y) * 0.5
+        ).astype(int)
+        y = self.rng.integers(y_min, self.tree_bottom_y + 1)
+        return np.column_stack((x, y))
+
     def add_ornament_random(self, type_id, ref_image=None):
         # Try multiple positions to find one with good spacing
-        best_position = None
-        best_min_distance = 0
         max_attempts = 20  # Number of positions to try
         min_spacing = 60  # Minimum distance between ornaments
-        
-        for _ in range(max_attempts):
-            x = random.randint(self.tree_center_x - self.tree_width // 2,
-                               self.tree_center_x + self.tree_width // 2)
-
-            half_width = self.tree_width // 2
-
-            y_min = self.tree_top_y + int(
-                (abs(x - self.tree_center_x) / half_width)
-                * (self.tree_bottom_y - self.tree_top_y) * 0.5
-            )
-
-            y = random.randint(y_min, self.tree_bottom_y)
-            
-            # Calculate minimum distance to existing ornaments
-            min_distance = float('inf')
-            for orn in self.ornaments:
-                dx = x - orn.position[0]
-                dy = y - orn.position[1]
-                distance = (dx * dx + dy * dy) ** 0.5
-                min_distance = min(min_distance, distance)
-            
-            # If no ornaments exist yet, use this position
-            if not self.ornaments:
-                best_position = (x, y)
-                break
-            
-            # Keep track of the position with best spacing
-            if min_distance > best_min_distance:
-                best_min_distance = min_distance
-                best_position = (x, y)
-                
-                # If we found a position with good spacing, use it
-                if min_distance >= min_spacing:
-                    break
+        candidates = self._sample_candidates(max_attempts)
 
+        n = len(self.ornaments)
+        if n == 0:
+            best = candidates[0]
+        else:
+            # distance from every candidate to its nearest ornament, all at once
+            diff = candidates[:, None, :].astype(np.float32) - self.scene.position[None, :n, :]
+            min_distance = np.einsum("knd,knd->kn", diff, diff).min(axis=1)
+            good = np.flatnonzero(min_distance >= min_spacing * min_spacing)
+            # first candidate with good spacing, otherwise the best spaced one
+            best = candidates[good[0] if len(good) else np.argmax(min_distance)]
+
+        best_position = (int(best[0]), int(best[1]))
         ornament = self.create_ornament(type_id, best_position, ref_image=ref_image)
         self.add(ornament)
 
     # UPDATE LOOP
     def update(self):
-        # Check if any Painting exists for histogram specification
-        painting_refs = [o.ref_image for o in self.ornaments if isinstance(o, Painting) and o.ref_image is not None]
-        if painting_refs:
-            # Use the last added Painting as reference
-            ref_img = painting_refs[-1]
-            # Convert self.current_tree to np.array
-            tree_np = np.array(self.original_tree)
-            tree_matched = apply_histogram_specification(tree_np, np.array(ref_img))
-            self.current_tree = Image.fromarray(tree_matched)
-
-        blur_power = self.compute_global_blur()
-        ksize = max(3, 2 * blur_power + 1)
-
-        # Compute global contrast from Candy Canes
-        for orn in self.ornaments:
-            if isinstance(orn, DecorativeBall):
-                continue
-            if blur_power > 0:
-                orn.image = apply_blur(orn.original_image, ksize)
-            if isinstance(orn, Painting):
-                pass  # Painting update is currently disabled
-            orn.update()
-
-    # BLUR CALCULATION
-    def compute_global_blur(self):
-        return sum(
-            o.blur_strength
-            for o in self.ornaments
-            if isinstance(o, DecorativeBall)
-        )
+        # The tree is only rebuilt after a scene change (painting, candy cane...)
+        if self.tree_graph.dirty:
+            with profiler.stage("tree"):
+                self.current_tree = self.tree_graph.output()
+
+        # Vectorized update: every row of a type advances in its shared animation
+        # cycle at once; images are only looked up when drawing (OrnamentList.sprites)
+        with profiler.stage("effects"):
+            scene = self.scene
+            n = len(scene)
+            types = scene.type_id[:n]
+            for type_id in np.unique(types):
+                kind = Ornament.kind(type_id)
+                rows = np.flatnonzero(types == type_id)
+                if kind.animation is None:
+                    # static ornament: the sprite with the current blur (none for balls)
+                    scene.shown[rows] = 0
+                    continue
+                cycle = kind.animation.cycle_for(ornament_sprite(type_id))
+                phase = scene.phase[rows]
+                scene.shown[rows] = phase
+                scene.phase[rows] = cycle.next_table[phase]
+
+    def _match_histogram(self, img, ref):
+        """Histogram specification of img to ref's cached luminance CDF (identity if no ref)."""
+        if ref is None:
+            return img
+        ref_cdf = self.cdf_cache.get(ref)
+        return Image.fromarray(specify_luminance(np.array(img), ref_cdf))
+
+    # GLOBAL EFFECTS
+    def _set_candy_canes(self, count):
+        """Tree contrast follows the number of candy canes (capped at 3.0)."""
+        self.candy_canes = count
+        self.global_contrast = min(1.0 + 0.05 * count, 3.0)
+        self.tree_graph.set_params("contrast", value=self.global_contrast)
+
+    def _set_blur_power(self, blur_power):
+        """Only runs when the set of balls changes; the kernel size applies to every non-ball row."""
+        self.blur_power = blur_power
+        ksize = max(3, 2 * blur_power + 1) if blur_power > 0 else 0
+        self.blur_ksize = self.scene.blur_ksize = ksize
@@ -1,17 +1,203 @@
 # app/ornaments/ornament.py
-from PIL import Image
 import os
-from utils.config import ASSETS_PATH
+from collections import OrderedDict
+import numpy as np
+from utils.assets import get_sprite
+from ornaments.animation import blurred_frame
+from ornaments.scene import SceneStore
+
+FRAME_TABLE_CACHE_SIZE = 16  # (type, blur) tables kept, least recently used dropped first
+_frame_tables = OrderedDict()  # {(type_id, blur ksize): object array of frames, the raw sprite last}
+
+
+def ornament_sprite(type_id):
+    return get_sprite(os.path.join("ornaments", f"ornament{type_id}.png"), (70, 70))
+
 
 class Ornament:
+    """
+    Lightweight handle on one row of a SceneStore (no per-ornament image or
+    __dict__). A new ornament lives in a one-row store of its own until
+    OrnamentManager.add() moves it into the scene's table. The handle keeps the
+    row's uid, so using it after its row was removed raises LookupError instead
+    of reading whichever ornament took the index.
+    Subclasses set TYPE_ID to be used for the rows of that type, and animation
+    (an ornaments.animation.Animation) to animate.
+    """
+    __slots__ = ("store", "index", "uid")
+    kinds = {}            # {type_id: Ornament subclass}
+    TYPE_ID = None
+    animation = None
+    blur_strength = 0     # contribution to the global blur; ornaments that blur stay sharp
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.TYPE_ID is not None:
+            Ornament.kinds[cls.TYPE_ID] = cls
+
     def __init__(self, type_id, position):
-        path = os.path.join(ASSETS_PATH, "ornaments", f"ornament{type_id}.png")
-        self.image = Image.open(path).resize((70, 70))
-        self.original_image = self.image.copy()
-        self.position = position  # (x,y)
-        self.type_id = type_id
-        self.tk_img = None
-        self.selected = False     # optional (future UI)
+        store = SceneStore(capacity=1)
+        self.bind(store, store.append(type_id, position, blur=self.blur_strength))
+
+    @classmethod
+    def kind(cls, type_id):
+        return Ornament.kinds.get(int(type_id), Ornament)
+
+    @classmethod
+    def view(cls, store, index):
+        """Handle on an existing row, of the class registered for its type."""
+        ornament = object.__new__(cls.kind(store.type_id[index]))
+        ornament.bind(store, index)
+        return ornament
+
+    @classmethod
+    def detached(cls, fields):
+        """Ornament holding a row that is not part of a scene (e.g. just removed)."""
+        ornament = object.__new__(cls.kind(fields["type_id"]))
+        store = SceneStore(capacity=1)
+        ornament.bind(store, store.append(**fields))
+        return ornament
+
+    def bind(self, store, index):
+        """Point the handle at row `index` of `store`."""
+        self.store = store
+        self.index = index
+        self.uid = int(store.uid[index])
+
+    @property
+    def row(self):
+        """Index of the ornament's row, checked against its uid."""
+        i = self.index
+        if i >= len(self.store) or self.store.uid[i] != self.uid:
+            raise LookupError("ornament is no longer in its scene")
+        return i
+
+    def __eq__(self, other):
+        return isinstance(other, Ornament) and self.store is other.store and self.uid == other.uid
+
+    def __hash__(self):
+        return hash((id(self.store), self.uid))
+
+    @classmethod
+    def frame_table(cls, type_id, ksize):
+        """
+        Every image a row of this type can show with the given blur, indexed by
+        the `shown` column (-1 picks the last entry, the sprite as loaded).
+        """
+        key = (int(type_id), ksize)
+        table = _frame_tables.get(key)
+        if table is None:
+            sprite = ornament_sprite(type_id)
+            frames = cls.animation.cycle_for(sprite).frames if cls.animation is not None else [sprite]
+            table = np.empty(len(frames) + 1, dtype=object)
+            table[:-1] = [blurred_frame(frame, ksize, (key[0], state))
+                          for state, frame in enumerate(frames)]
+            table[-1] = sprite
+            _frame_tables[key] = table
+            if len(_frame_tables) > FRAME_TABLE_CACHE_SIZE:
+                _frame_tables.popitem(last=False)
+        else:
+            _frame_tables.move_to_end(key)
+        return table
+
+    # Row fields
+    @property
+    def type_id(self):
+        return int(self.store.type_id[self.row])
+
+    @property
+    def position(self):
+        x, y = self.store.position[self.row]
+        return (int(x), int(y))
+
+    @position.setter
+    def position(self, value):
+        self.store.position[self.row] = value
+
+    @property
+    def frame_index(self):
+        """Position in the shared animation cycle."""
+        return int(self.store.phase[self.row])
+
+    @property
+    def selected(self):
+        return bool(self.store.selected[self.row])
+
+    @selected.setter
+    def selected(self, value):
+        self.store.selected[self.row] = value
+
+    @property
+    def blur_ksize(self):
+        """Global blur set by the manager (0 = sharp)."""
+        return 0 if self.blur_strength else self.store.blur_ksize
+
+    @property
+    def original_image(self):
+        return ornament_sprite(self.type_id)
+
+    @property
+    def image(self):
+        table = self.frame_table(self.type_id, self.blur_ksize)
+        return table[self.store.shown[self.row]]
 
     def update(self):
-        pass  # Placeholder for specific ornament behavior
\ No newline at end of file
+        """Advance this ornament alone (OrnamentManager.update advances whole types at once)."""
+        store, i = self.store, self.row
+        if self.animation is None:
+            store.shown[i] = 0  # static ornament: the sprite with the current blur
+            return
+        cycle = self.animation.cycle_for(self.original_image)
+        store.shown[i] = store.phase[i]
+        store.phase[i] = cycle.next_index(store.phase[i])
+
+
+class OrnamentList:
+    """
+    Sequence of the ornaments of a SceneStore, in drawing order. Items are
+    handles created on access; sprites() resolves every row's image per type
+    instead of per ornament.
+    """
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Ornament.view(self.store, j) for j in range(*i.indices(len(self.store)))]
+        n = len(self.store)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("ornament index out of range")
+        return Ornament.view(self.store, i)
+
+    def __iter__(self):
+        for i in range(len(self.store)):
+            yield Ornament.view(self.store, i)
+
+    def __eq__(self, other):
+        # compares like the list of ornaments it stands for
+        if isinstance(other, OrnamentList):
+            return self.store is other.store or list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def sprites(self):
+        """(images, positions): object array of the image shown by each row, (N, 2) centres."""
+        store = self.store
+        n = len(store)
+        images = np.empty(n, dtype=object)
+        types = store.type_id[:n]
+        shown = store.shown[:n]
+        for type_id in np.unique(types):
+            kind = Ornament.kind(type_id)
+            rows = np.flatnonzero(types == type_id)
+            ksize = 0 if kind.blur_strength else store.blur_ksize
+            images[rows] = kind.frame_table(type_id, ksize)[shown[rows]]
+        return images, store.position[:n]
@@ -2,6 +2,20 @@
 from ornaments.ornament import Ornament
 
 class Painting(Ornament):
+    __slots__ = ()
+    TYPE_ID = 3
+
     def __init__(self, position, ref_image=None):
-        super().__init__(type_id=3, position=position)
-        self.ref_image = ref_image  
+        super().__init__(type_id=self.TYPE_ID, position=position)
+        self.ref_image = ref_image
+
+    @property
+    def ref_image(self):
+        return self.store.extras.get(self.row)
+
+    @ref_image.setter
+    def ref_image(self, image):
+        if image is None:
+            self.store.extras.pop(self.row, None)
+        else:
+            self.store.extras[self.row] = image
@@ -0,0 +1,76 @@
+# app/ornaments/scene.py
+import numpy as np
+
+
+class SceneStore:
+    """
+    Struct-of-arrays table of the ornaments of a scene, one row per ornament in
+    placement (and drawing) order. Rows only hold numbers; sprites and animation
+    frames are shared per type, so memory per ornament is a few bytes.
+    - type_id: ornament type (1..5)
+    - position: (x, y) centre on the tree
+    - phase: next animation state; shown: state on display (-1 = sprite as loaded)
+    - blur: contribution to the global blur (balls)
+    - uid: serial number of the row, never reused (lets views tell a row that was
+      removed and re-added apart from an unchanged one)
+    - blur_ksize: global blur kernel applied to every ornament that does not blur
+    """
+    COLUMNS = ("type_id", "position", "phase", "shown", "blur", "selected", "uid")
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.type_id = np.zeros(capacity, dtype=np.int16)
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.phase = np.zeros(capacity, dtype=np.int32)
+        self.shown = np.full(capacity, -1, dtype=np.int32)
+        self.blur = np.zeros(capacity, dtype=np.int16)
+        self.selected = np.zeros(capacity, dtype=bool)
+        self.uid = np.zeros(capacity, dtype=np.int64)
+        self.next_uid = 0
+        self.blur_ksize = 0
+        self.extras = {}  # {row: reference image} for the few rows that need one (paintings)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = 2 * max(1, len(self.type_id))
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def append(self, type_id, position, phase=0, shown=-1, blur=0, selected=False, extra=None):
+        """Add a row at the end; returns its index."""
+        if self.count == len(self.type_id):
+            self._grow()
+        i = self.count
+        self.type_id[i] = type_id
+        self.position[i] = position
+        self.phase[i] = phase
+        self.shown[i] = shown
+        self.blur[i] = blur
+        self.selected[i] = selected
+        self.uid[i] = self.next_uid
+        self.next_uid += 1
+        if extra is not None:
+            self.extras[i] = extra
+        self.count += 1
+        return i
+
+    def row(self, i):
+        """Fields of row i, as accepted by append()."""
+        return dict(type_id=int(self.type_id[i]), position=tuple(self.position[i]),
+                    phase=int(self.phase[i]), shown=int(self.shown[i]), blur=int(self.blur[i]),
+                    selected=bool(self.selected[i]), extra=self.extras.get(i))
+
+    def pop(self):
+        """Remove the last row; returns its fields."""
+        fields = self.row(self.count - 1)
+        self.extras.pop(self.count - 1, None)
+        self.count -= 1
+        return fields
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
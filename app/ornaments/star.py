@@ -1,19 +1,22 @@
 # app/ornaments/star.py
 from ornaments.ornament import Ornament
-from ornaments.effects import apply_brightness
+from ornaments.animation import Animation
+from ornaments.effects import apply_brightness, apply_brightness_batch
 
-class Star(Ornament):
-    def __init__(self, position):
-        super().__init__(type_id=5, position=position)
-        self.brightness = 0
-        self.delta = 20  # bigger steps for visible effect
+def _pulse(state):
+    brightness, delta = state
+    brightness += delta  # bigger steps for visible effect
 
-    def update(self):
-        # Always start from original image
-        self.image = apply_brightness(self.original_image, self.brightness)
+    # Bounce between -100 and +100 for stronger pulse
+    if brightness > 100 or brightness < -100:
+        delta *= -1
+    return brightness, delta
 
-        self.brightness += self.delta
+class Star(Ornament):
+    __slots__ = ()
+    TYPE_ID = 5
+    animation = Animation(initial=(0, 20), step=_pulse, render=apply_brightness,
+                          render_batch=apply_brightness_batch)
 
-        # Bounce between -100 and +100 for stronger pulse
-        if self.brightness > 100 or self.brightness < -100:
-            self.delta *= -1
\ No newline at end of file
+    def __init__(self, position):
+        super().__init__(type_id=self.TYPE_ID, position=position)
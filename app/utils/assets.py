@@ -0,0 +1,31 @@
+# app/utils/assets.py
+from PIL import Image
+import os
+import threading
+from utils.config import ASSETS_PATH
+
+_sprites = {}   # {(path, size): decoded image}
+_sprites_lock = threading.Lock()
+
+def load_asset(path, size=None):
+    full = os.path.join(ASSETS_PATH, path)
+    img = Image.open(full)
+    if size:
+        img = img.resize(size)
+    return img
+
+def get_sprite(path, size=None):
+    """
+    Process-wide sprite registry: each asset is decoded and resized once per size.
+    The returned image is shared, so it is marked read-only: PIL copies it
+    before any in-place edit instead of changing it for every user.
+    """
+    key = (path, tuple(size) if size else None)
+    with _sprites_lock:
+        img = _sprites.get(key)
+        if img is None:
+            img = load_asset(path, size)
+            img.load()
+            img.readonly = 1
+            _sprites[key] = img
+    return img
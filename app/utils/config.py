@@ -3,3 +3,27 @@ import os
 
 ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 ASSETS_PATH = os.path.join(ROOT, "assets")
+
+# Rendering
+USE_COMPOSITOR = False  # blend the scene in NumPy and hand Tk one image per frame
+
+# Vision
+USE_INFERENCE_WORKER = False  # run MediaPipe in a separate process fed through shared memory
+HAND_TRACK_ROI = False        # search around the previous hand instead of the full frame
+HAND_INFERENCE_SIZE = None    # e.g. 480: downscale the searched region to this longest side
+HAND_DETECT_EVERY = 1         # e.g. 3: run the model on one frame in 3, optical flow in between
+USERS = 1                     # e.g. 2: side by side trees, one per band of the camera frame
+
+# Frame scheduling (None = every frame)
+TARGET_FPS = 30
+DETECTION_FPS = None
+ANIMATION_FPS = 30
+RENDER_FPS = None
+PREVIEW_FPS = 15
+
+# Camera preview ('v' toggles it)
+SHOW_PREVIEW = True
+PREVIEW_WIDTH = 480  # the camera frame is downsampled to this width before reaching Tk
+
+# Instrumentation
+PROFILE = False  # start with the timing overlay on ('p' toggles it, 't' exports a trace)
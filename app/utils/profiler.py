@@ -0,0 +1,118 @@
+# app/utils/profiler.py
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class _NullSpan:
+    """Shared do-nothing context manager returned while profiling is disabled."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, self.profiler.clock() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Per-stage timing: durations go into fixed-size ring buffers (for p50/p95/p99)
+    and into a bounded event list that can be exported as a Chrome trace
+    (chrome://tracing or ui.perfetto.dev). When disabled, stage() returns a
+    shared no-op context manager, so instrumented code pays one attribute check.
+    """
+    def __init__(self, enabled=False, capacity=512, trace_capacity=50000, clock=time.perf_counter):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.clock = clock
+        self._durations = {}   # {name: [ring buffer (seconds), next index, count]}
+        self._frames = deque(maxlen=capacity)  # frame start timestamps
+        self._events = deque(maxlen=trace_capacity)
+        self._lock = threading.Lock()
+        self._epoch = clock()
+
+    def stage(self, name):
+        """Context manager timing one stage: `with profiler.stage("render"): ...`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, duration):
+        with self._lock:
+            ring = self._durations.get(name)
+            if ring is None:
+                ring = self._durations[name] = [np.zeros(self.capacity), 0, 0]
+            ring[0][ring[1]] = duration
+            ring[1] = (ring[1] + 1) % self.capacity
+            ring[2] = min(ring[2] + 1, self.capacity)
+            self._events.append((name, start, duration, threading.get_ident()))
+
+    def mark_frame(self):
+        """Call once per frame to measure FPS."""
+        if self.enabled:
+            self._frames.append(self.clock())
+
+    def fps(self):
+        if len(self._frames) < 2:
+            return 0.0
+        span = self._frames[-1] - self._frames[0]
+        return (len(self._frames) - 1) / span if span > 0 else 0.0
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        """Percentiles of a stage's recent durations, in milliseconds."""
+        with self._lock:
+            ring = self._durations.get(name)
+            if ring is None or ring[2] == 0:
+                return None
+            samples = ring[0][:ring[2]].copy()
+        return tuple(np.percentile(samples, q) * 1000.0)
+
+    def summary(self):
+        lines = [f"FPS {self.fps():5.1f}", "stage          p50    p95    p99 ms"]
+        with self._lock:
+            names = sorted(self._durations)  # record() may add stages from other threads
+        for name in names:
+            p = self.percentiles(name)
+            if p is not None:
+                lines.append(f"{name:<12} {p[0]:6.1f} {p[1]:6.1f} {p[2]:6.1f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._frames.clear()
+            self._events.clear()
+
+    def export_trace(self, path):
+        """Write the recorded spans as Chrome trace JSON ("X" complete events, microseconds)."""
+        with self._lock:
+            events = list(self._events)
+        trace = [{
+            "name": name, "ph": "X", "pid": 1, "tid": tid,
+            "ts": (start - self._epoch) * 1e6, "dur": duration * 1e6,
+        } for name, start, duration, tid in events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+# Process-wide instance shared by the app's modules
+profiler = Profiler()
@@ -0,0 +1,88 @@
+# app/utils/scheduler.py
+import time
+
+class Stage:
+    """One unit of per-frame work with its own target rate and priority."""
+    def __init__(self, name, callback, fps, priority=0):
+        self.name = name
+        self.callback = callback
+        self.interval = 1.0 / fps if fps else 0.0
+        self.priority = priority    # higher runs first and is never dropped
+        self.cost = 0.0             # moving average of the run time (seconds)
+        self.next_due = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.skipped_in_row = 0     # consecutive skips, reset when the stage runs
+
+
+class FrameScheduler:
+    """
+    Runs stages at independent rates inside one frame loop (e.g. Tk's after()).
+    Each tick, due stages run from highest to lowest priority. If running a
+    lower-priority stage would overrun the frame budget, it is skipped and
+    retried next tick, so gesture handling is never delayed by animation or
+    preview refreshes. A stage skipped max_skips ticks in a row runs anyway,
+    so one that costs more than the whole budget still progresses (and has its
+    cost re-measured) instead of freezing.
+    """
+    def __init__(self, target_fps=30, clock=time.perf_counter, smoothing=0.2, profiler=None,
+                 max_skips=4):
+        self.frame_budget = 1.0 / target_fps
+        self.clock = clock
+        self.profiler = profiler  # optional utils.profiler.Profiler timing each stage
+        self.smoothing = smoothing
+        self.max_skips = max_skips
+        self.stages = []
+        self.essential_priority = None  # stages at or above this priority are never skipped
+        self.last_tick_cost = 0.0
+
+    def add_stage(self, name, callback, fps=None, priority=0, essential=False):
+        stage = Stage(name, callback, fps, priority)
+        self.stages.append(stage)
+        self.stages.sort(key=lambda s: -s.priority)
+        if essential and (self.essential_priority is None or priority < self.essential_priority):
+            self.essential_priority = priority
+        return stage
+
+    def stage(self, name):
+        return next(s for s in self.stages if s.name == name)
+
+    def set_rate(self, name, fps):
+        self.stage(name).interval = 1.0 / fps if fps else 0.0
+
+    def _essential(self, stage):
+        return self.essential_priority is not None and stage.priority >= self.essential_priority
+
+    def tick(self):
+        """Run due stages; returns the delay (ms) until the next tick should start."""
+        start = self.clock()
+        if self.profiler is not None:
+            self.profiler.mark_frame()
+        slack = self.frame_budget / 2  # ticks are discrete, accept a stage half a frame early
+        for stage in self.stages:
+            now = self.clock()
+            if now < stage.next_due - slack:
+                continue
+            if (not self._essential(stage) and stage.skipped_in_row < self.max_skips
+                    and (now - start) + stage.cost > self.frame_budget):
+                stage.skipped += 1  # behind: drop this stage for the current frame
+                stage.skipped_in_row += 1
+                continue
+
+            if self.profiler is not None:
+                with self.profiler.stage(stage.name):
+                    stage.callback()
+            else:
+                stage.callback()
+            end = self.clock()
+            stage.cost += self.smoothing * ((end - now) - stage.cost)
+            stage.runs += 1
+            stage.skipped_in_row = 0
+            stage.next_due += stage.interval
+            if stage.next_due < now:
+                stage.next_due = now + stage.interval  # fell behind: don't catch up on missed runs
+
+        end = self.clock()
+        self.last_tick_cost = end - start
+        # ticks run at target_fps at most; a slow tick starts the next one right away
+        return max(1, int((self.frame_budget - self.last_tick_cost) * 1000))
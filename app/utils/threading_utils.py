@@ -1,2 +1,44 @@
 # app/utils/threading_utils.py
-# Placeholder for locks, thread pools, etc.
\ No newline at end of file
+import threading
+from collections import deque
+
+class RingBuffer:
+    """
+    Small thread-safe buffer with drop-oldest semantics.
+    A producer never waits: when the buffer is full the oldest item is discarded.
+    With capacity=1 it is a latest-value slot.
+    """
+    def __init__(self, capacity=1):
+        self._items = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self.dropped = 0   # items discarded before anyone read them
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def latest(self):
+        """Newest item without removing it, or None. Never blocks."""
+        with self._cond:
+            return self._items[-1] if self._items else None
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, waiting up to timeout seconds. None on timeout."""
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def drain(self):
+        """Remove and return all buffered items, oldest first."""
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
@@ -1,25 +1,75 @@
 # app/vision/camera_thread.py
+import threading
+import time
+from collections import namedtuple
 import cv2
-from ornaments.effects import apply_histogram_specification
+from utils.threading_utils import RingBuffer
+from utils.profiler import profiler
+
+# A captured frame with its capture time (time.perf_counter) and sequence number
+CapturedFrame = namedtuple("CapturedFrame", ["image", "timestamp", "seq"])
 
 class CameraThread:
-    def __init__(self, cam_idx=0):
+    """
+    Captures frames on a background thread; readers only ever see the latest ones.
+    stop() and release() never wait for the capture thread, so they are safe to
+    call from the Tk thread; start() refuses while the previous thread still runs.
+    """
+    def __init__(self, cam_idx=0, buffer_size=1):
         self.cap = cv2.VideoCapture(cam_idx)
+        self.frames = RingBuffer(buffer_size)
         self.last_frame = None
         self.running = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._seq = 0
+
+    def _capture_loop(self, stop):
+        while not stop.is_set():
+            with profiler.stage("camera"):
+                ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)  # camera stalled or not ready yet
+                continue
+            self._seq += 1
+            self.frames.put(CapturedFrame(frame, time.perf_counter(), self._seq))
+
+    def latest(self):
+        """Newest CapturedFrame or None. Never blocks on the camera."""
+        return self.frames.latest()
 
     def read_frame(self):
-        if self.running:
-            ret, frame = self.cap.read()
-            if ret:
-                self.last_frame = frame
+        packet = self.latest()
+        if packet is not None:
+            self.last_frame = packet.image
         return self.last_frame
 
     def stop(self):
+        """Signal the capture thread to exit after its current read; does not wait."""
         self.running = False
+        self._stop.set()
 
     def start(self):
+        """Start capturing; False while the previous capture thread is still exiting."""
+        if self.running:
+            return True
+        if self._thread is not None and self._thread.is_alive():
+            return False  # it still holds the device
+        self._stop = threading.Event()
         self.running = True
+        self._thread = threading.Thread(target=self._capture_loop, args=(self._stop,),
+                                        name="camera-capture", daemon=True)
+        self._thread.start()
+        return True
+
+    def release(self, timeout=2.0):
+        """Stop, then close the device from another thread once capture has exited."""
+        self.stop()
+        thread = self._thread
+
+        def close():
+            if thread is not None:
+                thread.join(timeout)
+            self.cap.release()
 
-    def release(self):
-        self.cap.release()
+        threading.Thread(target=close, name="camera-release").start()
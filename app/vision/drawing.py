@@ -0,0 +1,23 @@
+# app/vision/drawing.py
+import cv2
+
+# MediaPipe Hands topology (mp.solutions.hands.HAND_CONNECTIONS), kept here so
+# drawing does not need to import MediaPipe
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),            # thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),            # index
+    (5, 9), (9, 10), (10, 11), (11, 12),       # middle
+    (9, 13), (13, 14), (14, 15), (15, 16),     # ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # pinky and palm
+)
+
+
+def draw_hand(frame, landmarks, color=(0, 255, 0), point_color=(0, 0, 255), thickness=2):
+    """Draw a (21, 3) normalized landmark array with plain OpenCV (no MediaPipe protos needed)."""
+    h, w = frame.shape[:2]
+    points = [(int(x * w), int(y * h)) for x, y, _ in landmarks]
+    for a, b in HAND_CONNECTIONS:
+        cv2.line(frame, points[a], points[b], color, thickness)
+    for p in points:
+        cv2.circle(frame, p, thickness + 1, point_color, -1)
+    return frame
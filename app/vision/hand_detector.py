@@ -1,81 +1,278 @@
 import cv2
 import mediapipe as mp
+import numpy as np
+from collections import namedtuple
+from vision.drawing import draw_hand
 
 mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-
-
-# Count fingers from hand landmarks
-def count_fingers(hand_landmarks, hand_label=None):
-    lm = hand_landmarks.landmark
-    count = 0
-
-    # Thumb: comparison direction differs for left/right hands
-    # MediaPipe handedness label is 'Left' or 'Right'
-    if hand_label is None:
-        if lm[4].x > lm[3].x:
-            count += 1
-    else:
-        if hand_label == 'Right':
-            # Right hand: thumb tip x less than IP joint x when extended
-            if lm[4].x < lm[3].x:
-                count += 1
-        else:
-            # Left hand: thumb tip x greater than IP joint x when extended
-            if lm[4].x > lm[3].x:
-                count += 1
-
-    # if TIP.y < PIP.y, the finger is extended.
-    finger_tips = [8, 12, 16, 20]
-    for tip_id in finger_tips:
-        if lm[tip_id].y < lm[tip_id - 2].y:
-            count += 1
-
-    return count
+
+FINGER_TIPS = [8, 12, 16, 20]
+FINGER_PIPS = [6, 10, 14, 18]
+
+# One detected hand; landmarks is a (21, 3) normalized array, index_tip_pos in pixels
+HandResult = namedtuple("HandResult", ["finger_count", "index_tip_pos", "landmarks", "handedness"])
+
+
+def count_fingers_batch(landmarks, hand_labels=None):
+    """
+    Extended fingers of H hands in one step.
+    landmarks: (H, 21, 3) normalized array; hand_labels: H 'Left'/'Right'/None labels
+    Returns an (H,) int array.
+    """
+    # Thumb: extended when its tip is outside the IP joint, which is to the left
+    # for a 'Right' hand and to the right otherwise. Fingers: TIP above PIP.
+    right = np.array([label == 'Right' for label in hand_labels], dtype=bool) \
+        if hand_labels is not None else np.zeros(len(landmarks), dtype=bool)
+    thumb_dx = landmarks[:, 4, 0] - landmarks[:, 3, 0]
+    thumb = np.where(right, thumb_dx < 0, thumb_dx > 0)
+    fingers = np.count_nonzero(landmarks[:, FINGER_TIPS, 1] < landmarks[:, FINGER_PIPS, 1], axis=1)
+    return thumb.astype(np.int64) + fingers
+
+
+def count_fingers_array(landmarks, hand_label=None):
+    """Extended fingers of one hand, from a (21, 3) normalized landmark array."""
+    return int(count_fingers_batch(landmarks[None], [hand_label])[0])
+
+
+def hands_from_results(results, w, h):
+    """
+    List of HandResult from a MediaPipe result: landmarks are converted once into
+    an (H, 21, 3) array and all hands are counted together.
+    """
+    if not results.multi_hand_landmarks:
+        return []
+    landmarks = np.array([[(p.x, p.y, p.z) for p in hand.landmark]
+                          for hand in results.multi_hand_landmarks], dtype=np.float32)
+    labels = [None] * len(landmarks)
+    for idx, handedness in enumerate((results.multi_handedness or [])[:len(labels)]):
+        labels[idx] = handedness.classification[0].label
+    counts = count_fingers_batch(landmarks, labels)
+    tips = (landmarks[:, 8, :2] * (w, h)).astype(int)
+    return [HandResult(int(counts[i]), (int(tips[i, 0]), int(tips[i, 1])), landmarks[i], labels[i])
+            for i in range(len(landmarks))]
 
 
 class HandGesture:
-    def __init__(self):
+    """
+    MediaPipe Hands wrapper.
+    - track_roi: after a detection, only search a padded box around the previous
+      landmarks (with a separate static-image model, as the box moves every frame);
+      the full frame is searched again when the hand is lost
+    - inference_size: longest side (pixels) the searched region is downscaled to
+    - detect_every: run the model on one frame in k; in between, the landmarks are
+      carried forward with pyramidal Lucas-Kanade optical flow on a downscaled
+      grayscale frame (flow_scale), and the model runs again as soon as the mean
+      tracking error exceeds flow_max_error or a point is lost
+    - max_num_hands: hands searched per frame; process() reports one of them,
+      process_hands() all of them (one model pass for several users)
+    Landmarks are always reported in full-frame normalized coordinates.
+    Frames are processed in buffers owned by the detector (mirrored, RGB, gray,
+    annotation overlay), reused from call to call: the returned frame and
+    last_rgb are overwritten by the next call, copy them to keep them.
+    """
+    def __init__(self, annotate=True, track_roi=False, inference_size=None, roi_padding=0.3,
+                 detect_every=1, flow_scale=0.5, flow_max_error=12.0, max_num_hands=1):
+        self.max_num_hands = max_num_hands
         self.hands = mp_hands.Hands(
-            max_num_hands=1,
+            max_num_hands=max_num_hands,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
+        self.annotate = annotate    # return an overlay with the landmarks drawn on a copy of the frame
+        self.last_landmarks = None  # (21, 3) array of the last detected hand
+        self.last_handedness = None
+        self.last_rgb = None        # RGB frame the model last ran on (None on propagated frames)
+
+        self.track_roi = track_roi
+        self.inference_size = inference_size
+        self.roi_padding = roi_padding  # fraction of the hand's size added on each side
+        self.roi = None                 # (x0, y0, x1, y1) pixels, None = full-frame search
+        # Crops change size and offset every frame, which the tracking graph above
+        # (static_image_mode=False) assumes never happens: they get their own
+        # per-image graph, and the full-frame graph keeps a stable geometry
+        self.roi_hands = mp_hands.Hands(
+            static_image_mode=True,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=0.5
+        ) if track_roi else None
+
+        self.detect_every = detect_every
+        self.flow_scale = flow_scale
+        self.flow_max_error = flow_max_error
+        self.flow_params = dict(winSize=(15, 15), maxLevel=2,
+                                criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self._prev_gray = None      # downscaled grayscale of the previous frame
+        self._since_detect = 0      # frames propagated since the last model run
+        self._gray_index = 0        # which of the two gray buffers holds the current frame
+
+        self._buffers = {}          # {name: reusable array}
+
+    def close(self):
+        self.hands.close()
+        if self.roi_hands is not None:
+            self.roi_hands.close()
+
+    def _buffer(self, name, shape):
+        """Reusable uint8 array owned by the detector; reallocated only when the shape changes."""
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def _scratch(self, name, shape):
+        """Contiguous view into a flat reusable buffer, for sizes that change every frame (ROI)."""
+        size = shape[0] * shape[1] * shape[2]
+        flat = self._buffers.get(name)
+        if flat is None or flat.size < size:
+            flat = self._buffers[name] = np.empty(size, dtype=np.uint8)
+        return flat[:size].reshape(shape)
+
+    def _annotate(self, frame, hands_landmarks):
+        """Landmarks drawn on an overlay copy of frame, so the frame and last_rgb stay clean."""
+        overlay = self._buffer("overlay", frame.shape)
+        np.copyto(overlay, frame)
+        for landmarks in hands_landmarks:
+            draw_hand(overlay, landmarks)
+        return overlay
+
+    def _detect_region(self, rgb, roi):
+        """Run MediaPipe on rgb[roi] at inference size; map landmarks back to the full frame."""
+        h, w = rgb.shape[:2]
+        x0, y0, x1, y1 = roi
+        region = rgb[y0:y1, x0:x1]
+        rw, rh = x1 - x0, y1 - y0
+
+        longest = max(rw, rh)
+        if self.inference_size and longest > self.inference_size:
+            scale = self.inference_size / longest
+            size = (max(1, int(rw * scale)), max(1, int(rh * scale)))
+            region = cv2.resize(region, size, dst=self._scratch("region", (size[1], size[0], 3)),
+                                interpolation=cv2.INTER_AREA)
+        elif (rw, rh) != (w, h):
+            contiguous = self._scratch("region", region.shape)
+            np.copyto(contiguous, region)
+            region = contiguous
+
+        full_frame = (rw, rh) == (w, h)
+        results = (self.hands if full_frame else self.roi_hands).process(region)
+        if results.multi_hand_landmarks and not full_frame:
+            for hand_landmarks in results.multi_hand_landmarks:
+                for p in hand_landmarks.landmark:
+                    p.x = (x0 + p.x * rw) / w
+                    p.y = (y0 + p.y * rh) / h
+        return results
+
+    def _update_roi(self, landmarks, w, h):
+        xs = landmarks[:, 0] * w
+        ys = landmarks[:, 1] * h
+        pad = self.roi_padding * max(xs.max() - xs.min(), ys.max() - ys.min())
+        x0, x1 = int(max(0, xs.min() - pad)), int(min(w, xs.max() + pad))
+        y0, y1 = int(max(0, ys.min() - pad)), int(min(h, ys.max() + pad))
+        self.roi = (x0, y0, x1, y1) if x1 - x0 > 1 and y1 - y0 > 1 else None
+
+    def _detect(self, rgb):
+        h, w = rgb.shape[:2]
+        if self.roi is not None:
+            results = self._detect_region(rgb, self.roi)
+            if results.multi_hand_landmarks:
+                return results
+            self.roi = None  # hand lost: fall back to a full-frame search
+        return self._detect_region(rgb, (0, 0, w, h))
+
+    def _flow_frame(self, frame):
+        # two alternating buffers: the previous frame's gray stays valid for the flow
+        self._gray_index ^= 1
+        name = ("gray0", "gray1")[self._gray_index]
+        h, w = frame.shape[:2]
+        if self.flow_scale == 1:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._buffer(name, (h, w)))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._buffer("gray_full", (h, w)))
+        size = (max(1, round(w * self.flow_scale)), max(1, round(h * self.flow_scale)))
+        return cv2.resize(gray, size, dst=self._buffer(name, (size[1], size[0])),
+                          interpolation=cv2.INTER_AREA)
+
+    def _propagate(self, gray):
+        """Carry last_landmarks from the previous frame to this one; None if tracking failed."""
+        h, w = gray.shape
+        scale = np.array([w, h], dtype=np.float32)
+        points = (self.last_landmarks[:, :2] * scale).reshape(-1, 1, 2)
+        moved, status, error = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None,
+                                                        **self.flow_params)
+        if moved is None or not status.all() or error.mean() > self.flow_max_error:
+            return None
+        landmarks = self.last_landmarks.copy()
+        landmarks[:, :2] = moved.reshape(-1, 2) / scale
+        return landmarks
+
+    def _should_propagate(self, gray):
+        return (gray is not None and self._prev_gray is not None
+                and self._prev_gray.shape == gray.shape
+                and self.last_landmarks is not None
+                and self._since_detect < self.detect_every - 1)
 
     def process(self, frame):
         """
         Process frame and return:
         - finger_count (int)
-        - annotated frame
+        - mirrored frame (annotated if enabled; a reused buffer, see the class docstring)
         - index fingertip position in pixel coords (x, y)
-        with dranwn hand landmarks
         """
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
-
-        finger_count = 0
-        index_tip_pos = None
-
-        if results.multi_hand_landmarks:
-            for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS
-                )
-                
-                hand_label = None
-                if results.multi_handedness and len(results.multi_handedness) > idx:
-                    hand_label = results.multi_handedness[idx].classification[0].label
-
-                finger_count = count_fingers(hand_landmarks, hand_label)
-
-                # Get index fingertip position
-                lm = hand_landmarks.landmark
-                h, w, _ = frame.shape
-                tip_x = int(lm[8].x * w)
-                tip_y = int(lm[8].y * h)
-                index_tip_pos = (tip_x, tip_y)
+        frame = cv2.flip(frame, 1, dst=self._buffer("mirrored", frame.shape))
+        h, w, _ = frame.shape
+        gray = self._flow_frame(frame) if self.detect_every > 1 else None
 
+        landmarks = self._propagate(gray) if self._should_propagate(gray) else None
+        self._prev_gray = gray
+        if landmarks is None:
+            return self._process_detection(frame)
+
+        # Skipped frame: same outputs, from the propagated landmarks
+        self._since_detect += 1
+        self.last_rgb = None
+        self.last_landmarks = landmarks
+        if self.track_roi:
+            self._update_roi(landmarks, w, h)
+        finger_count = count_fingers_array(landmarks, self.last_handedness)
+        index_tip_pos = (int(landmarks[8, 0] * w), int(landmarks[8, 1] * h))
+        if self.annotate:
+            frame = self._annotate(frame, [landmarks])
         return finger_count, frame, index_tip_pos
+
+    def _process_detection(self, frame):
+        rgb = self.last_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._buffer("rgb", frame.shape))
+        results = self._detect(rgb)
+        self._since_detect = 0
+        h, w, _ = frame.shape
+
+        hands = hands_from_results(results, w, h)
+        if self.annotate:
+            frame = self._annotate(frame, [hand.landmarks for hand in hands])
+        if not hands:
+            self.last_landmarks = None
+            self.last_handedness = None
+            return 0, frame, None
+
+        hand = hands[-1]  # with several hands, the last one reported drives the gesture
+        self.last_landmarks = hand.landmarks
+        self.last_handedness = hand.handedness
+        if self.track_roi:
+            self._update_roi(hand.landmarks, w, h)
+        return hand.finger_count, frame, hand.index_tip_pos
+
+    def process_hands(self, frame):
+        """
+        Multi-user variant of process(): one full-frame model pass, every hand reported.
+        Returns (annotated mirrored frame, [HandResult...] ordered left to right).
+        last_landmarks/last_handedness describe the leftmost hand.
+        ROI tracking and optical-flow propagation only apply to process().
+        """
+        frame = cv2.flip(frame, 1, dst=self._buffer("mirrored", frame.shape))
+        h, w, _ = frame.shape
+        rgb = self.last_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._buffer("rgb", frame.shape))
+        results = self._detect_region(rgb, (0, 0, w, h))
+        hands = sorted(hands_from_results(results, w, h), key=lambda hand: hand.landmarks[0, 0])
+        self.last_landmarks = hands[0].landmarks if hands else None
+        self.last_handedness = hands[0].handedness if hands else None
+        if self.annotate:
+            frame = self._annotate(frame, [hand.landmarks for hand in hands])
+        return frame, hands
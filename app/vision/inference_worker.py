@@ -0,0 +1,163 @@
+# app/vision/inference_worker.py
+import multiprocessing
+import queue
+from collections import namedtuple
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from vision.drawing import draw_hand
+
+# Detection result tagged with the camera sequence number of the frame it came from
+InferenceResult = namedtuple(
+    "InferenceResult", ["seq", "finger_count", "landmarks", "handedness", "index_tip_pos"]
+)
+
+
+HEADER_BYTES = 8  # shared-memory slot: int64 camera seq, then the frame
+
+
+def _slot_views(buf, shape):
+    """(header, frame) arrays over a shared-memory slot; no copy."""
+    header = np.ndarray((1,), dtype=np.int64, buffer=buf)
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=HEADER_BYTES)
+    return header, frame
+
+
+def _worker_main(shm_name, shape, requests, results, detector_options):
+    """Inference process: reads frames straight out of shared memory and runs MediaPipe."""
+    from vision.hand_detector import HandGesture
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    header, frame = _slot_views(shm.buf, shape)
+    detector = HandGesture(annotate=False, **detector_options)
+    try:
+        while requests.get() is not None:
+            seq = int(header[0])
+            count, _, tip = detector.process(frame)
+            results.put(InferenceResult(seq, count, detector.last_landmarks,
+                                        detector.last_handedness, tip))
+    finally:
+        detector.close()
+        del header, frame
+        shm.close()
+
+
+class InferenceWorker:
+    """
+    Runs HandGesture in a separate process so inference does not add to the
+    Tk frame time. Frames are handed over through one shared-memory slot; a new
+    frame is only submitted when the worker is idle, so detection runs at its
+    own rate on the latest frame and the UI always uses the newest result.
+    The frame's camera seq travels in the slot's header and comes back in the
+    result (result.seq), so results can be matched to frames. A worker that
+    died is restarted on the next submit, up to max_restarts times.
+    """
+    def __init__(self, annotate=True, max_restarts=3, **detector_options):
+        self.annotate = annotate  # draw the latest landmarks on the returned frame
+        self.detector_options = detector_options  # forwarded to HandGesture in the worker
+        self._ctx = multiprocessing.get_context("spawn")
+        self._shm = None
+        self._slot = None
+        self._header = None
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._in_flight = None  # seq submitted and not answered yet
+        self._seq = 0
+        self.result = None      # latest InferenceResult
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.failed = False     # gave up after max_restarts
+
+    @property
+    def last_landmarks(self):
+        return self.result.landmarks if self.result is not None else None
+
+    @property
+    def last_handedness(self):
+        return self.result.handedness if self.result is not None else None
+
+    def _start(self, shape):
+        self.close()
+        self._shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + int(np.prod(shape)))
+        self._header, self._slot = _slot_views(self._shm.buf, shape)
+        self._requests = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main, name="hand-inference",
+            args=(self._shm.name, shape, self._requests, self._results,
+                  self.detector_options), daemon=True)
+        self._process.start()
+
+    def poll(self):
+        """Collect finished results without blocking; returns the latest one."""
+        if self._results is None:
+            return self.result
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if result.seq == self._in_flight:
+                self._in_flight = None
+            self.result = result
+        return self.result
+
+    def submit(self, frame, seq):
+        """
+        Copy frame and its camera seq into shared memory if the worker is idle.
+        Returns True if submitted.
+        """
+        if self.failed:
+            return False
+        if self._slot is None or self._slot.shape != frame.shape:
+            self._start(frame.shape)
+        self.poll()
+        if not self._process.is_alive():
+            # the worker died (an answer in flight will never come): start a new one
+            if self.restarts >= self.max_restarts:
+                print("Hand inference worker keeps exiting, detection stopped")
+                self.close()
+                self.failed = True
+                return False
+            self.restarts += 1
+            print(f"Hand inference worker exited (code {self._process.exitcode}), restarting")
+            self._start(frame.shape)
+        elif self._in_flight is not None:
+            return False
+        np.copyto(self._slot, frame)
+        self._header[0] = seq
+        self._in_flight = seq
+        self._requests.put(True)
+        return True
+
+    def process(self, frame, seq=None):
+        """
+        Same contract as HandGesture.process, using the latest available result:
+        (finger_count, annotated mirrored frame, index fingertip position).
+        seq: camera sequence number of the frame (default: a counter of calls).
+        """
+        self._seq = self._seq + 1 if seq is None else seq
+        self.submit(frame, self._seq)
+        annotated = cv2.flip(frame, 1)
+        result = self.result
+        if result is None:
+            return 0, annotated, None
+
+        if self.annotate and result.landmarks is not None:
+            draw_hand(annotated, result.landmarks)
+        return result.finger_count, annotated, result.index_tip_pos
+
+    def close(self):
+        if self._process is not None:
+            self._requests.put(None)
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        if self._shm is not None:
+            self._slot = self._header = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        self._in_flight = None
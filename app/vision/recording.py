@@ -0,0 +1,237 @@
+# app/vision/recording.py
+import json
+import os
+import time
+import numpy as np
+from vision.camera_thread import CapturedFrame
+from vision.drawing import draw_hand
+
+# One row per recorded frame; landmarks are NaN when no hand was detected
+DETECTION_DTYPE = np.dtype([
+    ("seq", np.int64),
+    ("timestamp", np.float64),      # capture time (time.perf_counter of the recording session)
+    ("finger_count", np.int8),      # NO_RESULT when the detector had no answer for this frame
+    ("handedness", np.int8),        # -1 none, 0 Left, 1 Right
+    ("tip", np.int16, (2,)),        # index fingertip in pixels, (-1, -1) when no hand
+    ("landmarks", np.float32, (21, 3)),
+])
+HANDEDNESS = {None: -1, "Left": 0, "Right": 1}
+HANDEDNESS_LABELS = {v: k for k, v in HANDEDNESS.items()}
+NO_RESULT = -1
+
+META_FILE = "session.json"
+TABLE_FILE = "detections.npy"
+
+
+def _chunk_path(path, index):
+    return os.path.join(path, f"frames_{index:05d}.npy")
+
+
+class SessionRecorder:
+    """
+    Records camera frames and detection results to a session directory:
+    - frames_NNNNN.npy: memory-mapped chunks of `chunk_frames` frames each
+    - detections.npy: compact side table (DETECTION_DTYPE), one row per frame
+    - session.json: frame shape, frame count, chunk size
+    Frames are written straight into the mapped chunk, no intermediate copies.
+    """
+    def __init__(self, path, chunk_frames=256):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.count = 0
+        self.shape = None
+        self._chunk = None
+        self._table = np.zeros(1024, dtype=DETECTION_DTYPE)
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, frame, timestamp, seq, finger_count=0, tip=None, landmarks=None, handedness=None):
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError(f"Frame shape changed during recording: {frame.shape} != {self.shape}")
+
+        slot = self.count % self.chunk_frames
+        if slot == 0:
+            self._next_chunk()
+        self._chunk[slot] = frame
+
+        if self.count == len(self._table):
+            self._table = np.resize(self._table, 2 * self.count)
+        row = self._table[self.count]
+        row["seq"] = seq
+        row["timestamp"] = timestamp
+        row["finger_count"] = finger_count
+        row["handedness"] = HANDEDNESS.get(handedness, -1)
+        row["tip"] = tip if tip is not None else (-1, -1)
+        row["landmarks"] = landmarks if landmarks is not None else np.nan
+        self.count += 1
+
+    def write_result(self, packet, detector, finger_count, tip):
+        """
+        Record a CapturedFrame together with what `detector` found in it. An
+        InferenceWorker answers with the result of an earlier frame; the frame
+        is then recorded with NO_RESULT, so landmarks never land on another image.
+        """
+        result = getattr(detector, "result", None)
+        if hasattr(detector, "submit") and (result is None or result.seq != packet.seq):
+            self.write(packet.image, packet.timestamp, packet.seq, NO_RESULT)
+            return
+        self.write(packet.image, packet.timestamp, packet.seq, finger_count, tip,
+                   detector.last_landmarks, detector.last_handedness)
+
+    def _next_chunk(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self.flush()  # keep the side table in step with the finished chunks
+        index = self.count // self.chunk_frames
+        self._chunk = np.lib.format.open_memmap(
+            _chunk_path(self.path, index), mode="w+", dtype=np.uint8,
+            shape=(self.chunk_frames,) + self.shape)
+
+    def flush(self):
+        np.save(os.path.join(self.path, TABLE_FILE), self._table[:self.count])
+        meta = {"count": self.count, "chunk_frames": self.chunk_frames,
+                "shape": list(self.shape) if self.shape else None}
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def close(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+        self.flush()
+
+
+class Recording:
+    """Read side of a session directory; frames are memory-mapped, never loaded whole."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.chunk_frames = meta["chunk_frames"]
+        self.shape = tuple(meta["shape"]) if meta["shape"] else None
+        self.table = np.load(os.path.join(path, TABLE_FILE))[:self.count]
+        chunks = (self.count + self.chunk_frames - 1) // self.chunk_frames
+        self._chunks = [np.load(_chunk_path(path, i), mmap_mode="r") for i in range(chunks)]
+
+    def __len__(self):
+        return self.count
+
+    def frame(self, index):
+        return self._chunks[index // self.chunk_frames][index % self.chunk_frames]
+
+    def detection(self, index):
+        """
+        (finger_count, index_tip_pos, landmarks, handedness) as recorded for frame
+        `index`, or None if the detector had no result for that frame.
+        """
+        row = self.table[index]
+        if row["finger_count"] == NO_RESULT:
+            return None
+        tip = (int(row["tip"][0]), int(row["tip"][1])) if row["tip"][0] >= 0 else None
+        landmarks = None if np.isnan(row["landmarks"][0, 0]) else row["landmarks"].copy()
+        return int(row["finger_count"]), tip, landmarks, HANDEDNESS_LABELS[int(row["handedness"])]
+
+    def duration(self):
+        if self.count < 2:
+            return 0.0
+        return float(self.table["timestamp"][-1] - self.table["timestamp"][0])
+
+
+class ReplaySource:
+    """
+    Stands in for CameraThread, serving a Recording.
+    - realtime: frames come out at their recorded pace (latest() skips ahead like a
+      live camera would); otherwise every call to latest() returns the next frame
+    - loop: start over at the end instead of stopping
+    """
+    def __init__(self, recording, realtime=True, loop=False, clock=time.perf_counter):
+        self.recording = recording
+        self.realtime = realtime
+        self.loop = loop
+        self.clock = clock
+        self.running = False
+        self.last_frame = None
+        self.position = -1  # index of the frame served last
+        self._start_time = None
+
+    def start(self):
+        if self.running:
+            return True
+        self.running = True
+        self.position = -1
+        self._start_time = self.clock()
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def release(self):
+        self.stop()
+
+    def _next_position(self):
+        n = len(self.recording)
+        if not self.realtime:
+            return self.position + 1
+        timestamps = self.recording.table["timestamp"]
+        elapsed = self.clock() - self._start_time
+        if self.loop and n > 1:
+            elapsed %= timestamps[-1] - timestamps[0] + 1e-9
+        target = int(np.searchsorted(timestamps, timestamps[0] + elapsed, side="right")) - 1
+        if self.loop:
+            return target
+        if target <= self.position == n - 1:
+            return n  # last frame already served
+        return max(self.position, target)
+
+    def latest(self):
+        """Newest CapturedFrame at the replay position, None before start or after the end."""
+        if not self.running or len(self.recording) == 0:
+            return None
+        position = self._next_position()
+        if position >= len(self.recording):
+            if not self.loop:
+                self.running = False  # end of the session
+                return None
+            position = 0
+            self._start_time = self.clock()
+        self.position = position
+        row = self.recording.table[position]
+        return CapturedFrame(self.recording.frame(position), float(row["timestamp"]), int(row["seq"]))
+
+    def read_frame(self):
+        packet = self.latest()
+        if packet is not None:
+            self.last_frame = packet.image
+        return self.last_frame
+
+
+class ReplayDetector:
+    """
+    Same contract as HandGesture.process, answering from a Recording instead of
+    running MediaPipe: the results recorded for the frame last served by `source`.
+    Frames recorded without a result keep the previous answer, as the
+    InferenceWorker did live.
+    """
+    def __init__(self, source, annotate=True):
+        self.source = source
+        self.annotate = annotate
+        self.last_landmarks = None
+        self.last_handedness = None
+        self._last = (0, None, None, None)
+
+    def process(self, frame):
+        detection = self.source.recording.detection(self.source.position)
+        if detection is not None:
+            self._last = detection
+        count, tip, landmarks, handedness = self._last
+        self.last_landmarks = landmarks
+        self.last_handedness = handedness
+        annotated = np.ascontiguousarray(frame[:, ::-1])  # mirrored, like HandGesture
+        if self.annotate and landmarks is not None:
+            draw_hand(annotated, landmarks)
+        return count, annotated, tip
+
+    def close(self):
+        pass
@@ -0,0 +1,281 @@
+# tests/benchmark_tests.py
+# Headless benchmarks (no display, no camera). Run from the project root:
+#   python -m tests.benchmark_tests                    compare against the baseline
+#   python -m tests.benchmark_tests --update-baseline  record a new baseline
+# Timings are machine-specific: record the baseline on the machine that runs the
+# checks. Runs fail (exit code 1) when there is no baseline yet, and when a case
+# is slower (or, for *.alloc_kb and *.rss_growth_kb, uses more memory) than
+# baseline * (1 + threshold).
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from tests.conftest import ROOT  # puts app/ on sys.path
+from ornaments import effects
+from ornaments.manager import OrnamentManager
+from utils.assets import get_sprite
+from gui.compositor import Compositor
+
+BASELINE_PATH = os.path.join(ROOT, "tests", "benchmark_baseline.json")
+IMAGE_SIZES = [(70, 70), (600, 580), (1280, 720)]
+ORNAMENT_COUNTS = [10, 100, 1000, 10000]
+MIN_DELTA_MS = 0.05  # smaller slowdowns are timer noise, never reported as regressions
+MIN_DELTA_RSS_KB = 1024  # RSS moves in pages and allocator arenas; smaller growth is noise
+RSS_FRAMES = 200
+BATCH_SIZE = 8  # parameter values per batched effect call (sprites x animation states)
+
+
+def measure(fn, repeat=7, number=1, setup=None):
+    """Best (least disturbed) time of `number` calls to fn over `repeat` runs, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1000.0)
+    return min(samples)
+
+
+def random_image(w, h, channels, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(h, w, channels), dtype=np.uint8)
+
+
+def bench_effects():
+    results = {}
+    lut = effects.compose_luts(effects.brightness_lut(20), effects.contrast_lut(1.5))
+    source_cdf = effects.luminance_cdf(random_image(600, 580, 3, seed=3))
+    template_cdf = effects.luminance_cdf(random_image(600, 580, 3, seed=4))
+    # Table builders do not depend on the image size; brightness_lut and contrast_lut
+    # are memoized, so both the build (__wrapped__) and the cache hit are timed
+    table_cases = {
+        "brightness_lut": lambda: effects.brightness_lut.__wrapped__(20),
+        "brightness_lut[cached]": lambda: effects.brightness_lut(20),
+        "contrast_lut": lambda: effects.contrast_lut.__wrapped__(1.5),
+        "contrast_lut[cached]": lambda: effects.contrast_lut(1.5),
+        "compose_luts": lambda: effects.compose_luts(
+            effects.brightness_lut(20), effects.contrast_lut(1.5), lut),
+        "cdf_match_lut": lambda: effects.cdf_match_lut(source_cdf, template_cdf),
+    }
+    for name, fn in table_cases.items():
+        results[f"effects.{name}"] = measure(fn, number=200)
+
+    values = np.linspace(-40, 40, BATCH_SIZE).astype(int).tolist()
+    factors = np.linspace(0.5, 2.0, BATCH_SIZE).tolist()
+    scales = np.linspace(0.02, 0.2, BATCH_SIZE).tolist()
+    luts = np.stack([effects.brightness_lut(v) for v in values])
+    for w, h in IMAGE_SIZES:
+        rgba = random_image(w, h, 4)
+        bgr = random_image(w, h, 3, seed=1)
+        ref = random_image(w, h, 3, seed=2)
+        ref_cdf = effects.luminance_cdf(ref)
+        y = effects.luminance_channel(bgr)
+        stack = effects.apply_lut_batch(rgba, luts)
+        color, alpha = effects.convert_to_np_array(rgba)
+        cases = {
+            "convert_to_np_array": lambda: effects.convert_to_np_array(rgba),
+            "reattach_alpha": lambda: effects.reattach_alpha(color, alpha),
+            "apply_brightness": lambda: effects.apply_brightness(rgba, 40),
+            "apply_contrast": lambda: effects.apply_contrast(rgba, 1.5),
+            "apply_lut": lambda: effects.apply_lut(rgba, lut),
+            "apply_blur": lambda: effects.apply_blur(rgba, 7),
+            "apply_mosaic": lambda: effects.apply_mosaic(rgba, 0.05),
+            "apply_histogram_equalization": lambda: effects.apply_histogram_equalization(bgr),
+            "apply_histogram_specification": lambda: effects.apply_histogram_specification(rgba, ref),
+            "apply_histogram_specification[per_channel]":
+                lambda: effects.apply_histogram_specification(rgba, ref, match_luminance=False),
+            "specify_luminance": lambda: effects.specify_luminance(rgba, ref_cdf),
+            "channel_cdf": lambda: effects.channel_cdf(y),
+            "luminance_channel": lambda: effects.luminance_channel(rgba),
+            "luminance_cdf": lambda: effects.luminance_cdf(rgba),
+            f"apply_lut_batch[{BATCH_SIZE}]": lambda: effects.apply_lut_batch(rgba, luts),
+            f"apply_brightness_batch[{BATCH_SIZE}]": lambda: effects.apply_brightness_batch(rgba, values),
+            f"apply_contrast_batch[{BATCH_SIZE}]": lambda: effects.apply_contrast_batch(rgba, factors),
+            f"apply_mosaic_batch[{BATCH_SIZE}]": lambda: effects.apply_mosaic_batch(rgba, scales),
+            f"stack_to_images[{BATCH_SIZE}]": lambda: effects.stack_to_images(stack),
+        }
+        number = 20 if w * h < 100000 else 3
+        for name, fn in cases.items():
+            results[f"effects.{name}@{w}x{h}"] = measure(fn, number=number)
+    return results
+
+
+def populated_manager(count, seed=0, balls=2):
+    """
+    Manager holding `count` ornaments of every type. Each ball widens the global
+    blur kernel, so only a fixed number of them are placed (first).
+    """
+    random.seed(seed)
+    manager = OrnamentManager()
+    manager.set_tree(get_sprite("tree.png", (600, 580)))
+    ref = get_sprite(os.path.join("artworks", "artwork1.jpeg"))
+    other_types = [1, 2, 3, 5]
+    for i in range(count):
+        type_id = 4 if i < balls else other_types[i % len(other_types)]
+        position = (random.randint(150, 450), random.randint(80, 500))
+        manager.add(manager.create_ornament(type_id, position, ref_image=ref if type_id == 3 else None))
+    manager.update()  # builds the shared animation cycles
+    return manager
+
+
+def current_rss_kb():
+    """Resident set size of this process in KB, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError):
+        return None
+
+
+def bench_hand_detector_allocations():
+    """
+    Memory used by HandGesture.process, in KB (needs mediapipe).
+    alloc_kb is the tracemalloc peak of one call: it only sees allocations made
+    through Python's allocator (numpy arrays included), not the native buffers
+    of OpenCV or MediaPipe's graph. rss_growth_kb covers those: the growth of
+    the process RSS over RSS_FRAMES calls, which stays flat unless something
+    leaks or keeps growing per frame.
+    """
+    try:
+        from vision.hand_detector import HandGesture
+    except ImportError:
+        print("mediapipe not installed: hand detector allocations not measured")
+        return {}
+    results = {}
+    frame = random_image(1920, 1080, 3)
+    for name, options in {"": {}, "[annotate=False]": {"annotate": False},
+                          "[detect_every=3]": {"detect_every": 3}}.items():
+        detector = HandGesture(**options)
+        for _ in range(3):
+            detector.process(frame)  # buffers are allocated on the first calls
+        peak = 0
+        tracemalloc.start()
+        for _ in range(10):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            detector.process(frame)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+        results[f"hand_detector.process{name}.alloc_kb@1920x1080"] = peak / 1024
+        rss_before = current_rss_kb()
+        if rss_before is not None:
+            for _ in range(RSS_FRAMES):
+                detector.process(frame)
+            growth = max(current_rss_kb() - rss_before, 0.0)
+            results[f"hand_detector.process{name}.rss_growth_kb@1920x1080"] = growth
+        detector.close()
+    return results
+
+
+def bench_manager_and_renderer():
+    results = {}
+    for count in ORNAMENT_COUNTS:
+        manager = populated_manager(count)
+        results[f"manager.update@{count}"] = measure(manager.update, repeat=5, number=3)
+
+        def add_then_remove():
+            manager.add_ornament_random(5)
+            manager.remove_last()
+        results[f"manager.add_ornament_random@{count}"] = measure(add_then_remove, repeat=5, number=5)
+
+        compositor = Compositor()
+        compose = lambda: compositor.compose(manager.current_tree, manager.ornaments)
+        results[f"compositor.compose@{count}"] = measure(compose, repeat=3, number=1)
+    return results
+
+
+def bench_tree_renderer():
+    """TreeRenderer on a real Tk canvas (the default render path); needs a display."""
+    import tkinter as tk
+    from gui.renderer import TreeRenderer
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("no display: TreeRenderer not measured")
+        return {}
+    root.withdraw()
+    results = {}
+    try:
+        for count in ORNAMENT_COUNTS:
+            manager = populated_manager(count)
+            for name, compositor in {"": False, "[compositor]": True}.items():
+                canvas = tk.Canvas(root, width=600, height=580)
+                renderer = TreeRenderer(manager, compositor=compositor)
+                renderer.render(canvas)
+
+                def render():
+                    renderer.render(canvas)
+                    root.update_idletasks()  # let Tk process the item changes
+                # one animation step per frame, as in the app's loop
+                results[f"tree_renderer.render{name}@{count}"] = measure(
+                    render, repeat=5, setup=manager.update)
+                if not compositor:
+                    # every item created again, as after switching canvases
+                    results[f"tree_renderer.render[redraw]@{count}"] = measure(
+                        render, repeat=3, setup=lambda: renderer._reset(canvas))
+                canvas.destroy()
+    finally:
+        root.destroy()
+    return results
+
+
+def run_all():
+    results = {}
+    results.update(bench_effects())
+    results.update(bench_manager_and_renderer())
+    results.update(bench_tree_renderer())
+    results.update(bench_hand_detector_allocations())
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the list of (name, baseline_ms, current_ms) that regressed beyond threshold."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        status = ""
+        min_delta = MIN_DELTA_RSS_KB if ".rss_growth_kb" in name else MIN_DELTA_MS
+        if base is not None and current > base * (1 + threshold) and current - base > min_delta:
+            regressions.append((name, base, current))
+            status = "REGRESSED"
+        base_txt = f"{base:10.3f}" if base is not None else "         -"
+        unit = "KB" if "_kb" in name else "ms"
+        print(f"{name:<60} {base_txt} {current:10.3f} {unit} {status}")
+    return regressions
+
+
+def test_benchmarks_against_baseline(threshold=0.25, update_baseline=False):
+    assert update_baseline or os.path.exists(BASELINE_PATH), (
+        f"No benchmark baseline at {BASELINE_PATH}: record one on this machine with "
+        "python -m tests.benchmark_tests --update-baseline")
+    results = run_all()
+    if update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline written to", BASELINE_PATH)
+        return
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, threshold)
+    assert not regressions, f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless performance benchmarks")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default 0.25)")
+    args = parser.parse_args()
+    try:
+        test_benchmarks_against_baseline(args.threshold, args.update_baseline)
+    except AssertionError as e:
+        print(e)
+        sys.exit(1)
@@ -0,0 +1,36 @@
+# tests/compositor_tests.py
+import numpy as np
+from utils.assets import get_sprite
+from gui.compositor import Compositor
+from ornaments.manager import OrnamentManager
+
+
+def compose_every_sprite(compositor, tree, ornaments):
+    """Reference path: blend every sprite in order and resolve each sprite's region."""
+    compositor.frame[...] = compositor.premultiply(tree)
+    compositor.output[...] = np.asarray(tree)
+    dirty = []
+    for ornament in ornaments:
+        sprite = compositor.premultiply(ornament.image)
+        h, w = sprite.shape[:2]
+        x, y = ornament.position
+        dirty.append(compositor._blend(sprite, x - w // 2, y - h // 2))
+    for rect in dirty:
+        if rect is not None:
+            compositor._resolve(rect)
+    return compositor.output
+
+
+def test_compose_matches_blending_every_sprite():
+    tree = get_sprite("tree.png", (600, 580))
+    manager = OrnamentManager()
+    manager.rng = np.random.default_rng(0)
+    manager.set_tree(tree)
+    for count in (10, 300):  # below and above the frame's area of sprites
+        while len(manager.ornaments) < count:
+            manager.add_ornament_random(1 + len(manager.ornaments) % 5)
+        for _ in range(3):
+            manager.update()
+        frame = Compositor(tree.size).compose(manager.current_tree, manager.ornaments)
+        expected = compose_every_sprite(Compositor(tree.size), manager.current_tree, manager.ornaments)
+        assert np.array_equal(frame, expected)
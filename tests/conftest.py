@@ -0,0 +1,9 @@
+# tests/conftest.py
+# Shared test setup. Run the tests from the project root: python -m pytest tests
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app")
+if APP not in sys.path:
+    sys.path.insert(0, APP)  # the app imports its modules from app/
@@ -3,7 +3,10 @@ from app.ornaments.effects import apply_brightness
 from app.ornaments.effects import apply_blur
 from app.ornaments.effects import apply_histogram_equalization
 from app.ornaments.effects import apply_contrast
+from app.ornaments.effects import apply_lut, compose_luts, brightness_lut, contrast_lut
+from app.ornaments.effects import _match_cdf, _match_cdf_unique
 import cv2
+import numpy as np
 
 def test_apply_brightness():
     img = cv2.imread("assets/ornaments/ornament5.png",cv2.IMREAD_UNCHANGED)
@@ -40,6 +43,21 @@ def test_apply_histogram_specification():
     out = apply_histogram_specification(src, ref, match_luminance=False, debug=True)
     cv2.imwrite("tests/assets/output_hist_spec.png", out)
 
+def test_fused_lut_matches_chained_effects():
+    img = cv2.imread("assets/tree.png", cv2.IMREAD_UNCHANGED)
+    chained = apply_contrast(np.array(apply_brightness(img, 30)), 1.5)
+    fused = apply_lut(img, compose_luts(brightness_lut(30), contrast_lut(1.5)))
+
+    assert np.array_equal(np.array(chained), np.array(fused))
+
+def test_histogram_lut_matches_unique_path():
+    src = cv2.imread("assets/tree.png", cv2.IMREAD_UNCHANGED)
+    ref = cv2.imread("assets/artworks/artwork1.jpeg", cv2.IMREAD_COLOR)
+
+    for c in range(3):
+        assert np.array_equal(_match_cdf(src[:, :, c], ref[:, :, c]),
+                              _match_cdf_unique(src[:, :, c], ref[:, :, c]))
+
 
 if __name__ == "__main__":
     test_apply_brightness()
@@ -47,3 +65,5 @@ if __name__ == "__main__":
     test_apply_blur()
     test_apply_histogram_equalization()
     test_apply_histogram_specification()
+    test_fused_lut_matches_chained_effects()
+    test_histogram_lut_matches_unique_path()
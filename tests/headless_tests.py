@@ -0,0 +1,22 @@
+# tests/headless_tests.py
+from headless import HeadlessRunner, ScriptedGestures
+from ornaments.painting import Painting
+
+
+def test_scripted_session_decorates_the_tree():
+    # 0.25 s stability and 0.5 s cooldown at 30 fps: a count held 20 ticks acts once
+    gestures = ScriptedGestures.parse("5,-,2,-,3,2,-", hold=20)
+    runner = HeadlessRunner(gestures=gestures, seed=0)
+    stats = runner.run()
+
+    assert stats["ticks"] == len(gestures)
+    assert [o.type_id for o in runner.manager.ornaments] == [5, 2, 3]
+    assert isinstance(runner.manager.ornaments[-1], Painting)
+    assert runner.controller.mode == "ornament"
+    assert runner.frame.shape == (580, 600, 4)
+
+
+def test_closed_hand_removes_the_last_ornament():
+    runner = HeadlessRunner(gestures=ScriptedGestures.parse("1,-,0", hold=20), seed=0)
+    runner.run()
+    assert runner.manager.ornaments == []
@@ -0,0 +1,51 @@
+# tests/manager_tests.py
+import numpy as np
+from utils.assets import get_sprite
+from ornaments.manager import OrnamentManager
+from gui.gesture_controller import GestureController
+
+
+def seeded_manager(seed=0):
+    manager = OrnamentManager()
+    manager.rng = np.random.default_rng(seed)
+    manager.set_tree(get_sprite("tree.png", (600, 580)))
+    return manager
+
+
+def test_random_positions_stay_on_the_placement_mask():
+    manager = seeded_manager()
+    for i in range(200):
+        manager.add_ornament_random((1, 2, 4, 5)[i % 4])
+    xs, ys = manager.scene.position[:len(manager.scene)].astype(int).T
+    assert manager.placement_mask[ys, xs].all()
+
+
+def test_keyboard_adds_use_the_placement_mask():
+    positions = []
+    for _ in range(2):
+        manager = seeded_manager(seed=3)
+        controller = GestureController(manager, painting_paths=[])
+        for idx in (1, 2, 4, 5) * 10:
+            controller.manual_add(idx)
+        xs, ys = manager.scene.position[:len(manager.scene)].astype(int).T
+        assert manager.placement_mask[ys, xs].all()
+        positions.append(manager.scene.position[:len(manager.scene)].copy())
+    assert np.array_equal(positions[0], positions[1])  # reproducible from the manager's seed
+
+
+def test_remove_last_restores_the_tree_effects():
+    manager = seeded_manager()
+    original = np.asarray(manager.current_tree).copy()
+
+    for type_id in (1, 4, 1):  # candy cane, ball, candy cane
+        manager.add_ornament_random(type_id)
+    manager.update()
+    assert manager.tree_graph.node("contrast").params["value"] > 1.0
+    assert manager.blur_ksize > 0
+
+    while manager.remove_last() is not None:
+        pass
+    manager.update()
+    assert manager.tree_graph.node("contrast").params["value"] == 1.0
+    assert manager.blur_ksize == 0
+    assert np.array_equal(np.asarray(manager.current_tree), original)
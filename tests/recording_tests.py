@@ -0,0 +1,130 @@
+# tests/recording_tests.py
+import tempfile
+
+import numpy as np
+from vision.recording import SessionRecorder, Recording, ReplaySource, ReplayDetector
+from vision.camera_thread import CapturedFrame
+from vision.inference_worker import InferenceResult
+
+
+def record_session(path, count=10, chunk_frames=4):
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8) for _ in range(count)]
+    recorder = SessionRecorder(path, chunk_frames=chunk_frames)
+    for i, frame in enumerate(frames):
+        hand = i % 2 == 1
+        landmarks = rng.random((21, 3), dtype=np.float32) if hand else None
+        recorder.write(frame, i / 30, i + 1, finger_count=i % 6,
+                       tip=(i, 2 * i) if hand else None, landmarks=landmarks,
+                       handedness="Right" if hand else None)
+    recorder.close()
+    return frames
+
+
+def test_recording_round_trip():
+    with tempfile.TemporaryDirectory() as path:
+        frames = record_session(path)
+        recording = Recording(path)
+        assert len(recording) == len(frames)
+        for i, frame in enumerate(frames):
+            assert np.array_equal(recording.frame(i), frame)
+        assert recording.detection(0) == (0, None, None, None)
+        count, tip, landmarks, handedness = recording.detection(3)
+        assert (count, tip, handedness) == (3, (3, 6), "Right") and landmarks.shape == (21, 3)
+
+
+def test_replay_at_max_speed_serves_every_frame():
+    with tempfile.TemporaryDirectory() as path:
+        record_session(path)
+        source = ReplaySource(Recording(path), realtime=False)
+        detector = ReplayDetector(source, annotate=False)
+        source.start()
+        seqs, counts = [], []
+        while (packet := source.latest()) is not None:
+            seqs.append(packet.seq)
+            counts.append(detector.process(packet.image)[0])
+        assert seqs == list(range(1, 11))
+        assert counts == [i % 6 for i in range(10)]
+        assert not source.running
+
+
+class LaggingWorker:
+    """Answers like an InferenceWorker: the latest result is for a frame `lag` seqs back."""
+    def __init__(self, lag):
+        self.lag = lag
+        self.result = None
+
+    def submit(self, frame, seq):
+        return True
+
+    def process(self, frame, seq):
+        answered = seq - self.lag
+        if answered >= 1 and answered % 2 == 1:  # a result comes back every other frame
+            landmarks = np.full((21, 3), answered, dtype=np.float32)
+            self.result = InferenceResult(answered, answered % 6, landmarks, "Left", (answered, 0))
+        r = self.result
+        return (0, frame, None) if r is None else (r.finger_count, frame, r.index_tip_pos)
+
+    @property
+    def last_landmarks(self):
+        return None if self.result is None else self.result.landmarks
+
+    @property
+    def last_handedness(self):
+        return None if self.result is None else self.result.handedness
+
+
+def test_recording_keeps_worker_results_with_their_frames():
+    with tempfile.TemporaryDirectory() as path:
+        worker = LaggingWorker(lag=2)
+        recorder = SessionRecorder(path, chunk_frames=4)
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        for seq in range(1, 11):
+            count, _, tip = worker.process(frame, seq)
+            recorder.write_result(CapturedFrame(frame, seq / 30, seq), worker, count, tip)
+        recorder.close()
+
+        recording = Recording(path)
+        for i in range(len(recording)):
+            detection = recording.detection(i)
+            assert detection is None  # every result arrived after its frame was recorded
+        source = ReplaySource(recording, realtime=False)
+        detector = ReplayDetector(source, annotate=False)
+        source.start()
+        while (packet := source.latest()) is not None:
+            assert detector.process(packet.image)[0] == 0
+
+    with tempfile.TemporaryDirectory() as path:
+        worker = LaggingWorker(lag=0)
+        recorder = SessionRecorder(path)
+        for seq in range(1, 7):
+            count, _, tip = worker.process(frame, seq)
+            recorder.write_result(CapturedFrame(frame, seq / 30, seq), worker, count, tip)
+        recorder.close()
+
+        recording = Recording(path)
+        for i, seq in enumerate(recording.table["seq"]):
+            detection = recording.detection(i)
+            if seq % 2 == 1:
+                count, tip, landmarks, _ = detection
+                assert count == seq % 6 and tip == (seq, 0) and np.all(landmarks == seq)
+            else:
+                assert detection is None  # the worker still showed the previous frame's hand
+        source = ReplaySource(recording, realtime=False)
+        detector = ReplayDetector(source, annotate=False)
+        source.start()
+        counts = []
+        while (packet := source.latest()) is not None:
+            counts.append(detector.process(packet.image)[0])
+        assert counts == [1, 1, 3, 3, 5, 5]  # frames without a result keep the last answer
+
+
+def test_replay_in_realtime_follows_the_recorded_clock():
+    with tempfile.TemporaryDirectory() as path:
+        record_session(path)
+        now = [0.0]
+        source = ReplaySource(Recording(path), realtime=True, clock=lambda: now[0])
+        source.start()
+        assert source.latest().seq == 1
+        now[0] = 5 / 30 + 1e-6
+        assert source.latest().seq == 6  # frames in between are skipped, like a live camera